@@ -0,0 +1,342 @@
+"""
+Benchmark suite for the notifier's hot paths.
+
+Measures throughput and per-call latency for:
+
+  - interpreter_loader.evaluate(), across label counts and
+    interpreter counts;
+  - service_tracker_dashboard._to_canonical();
+  - ContainerSnapshot.from_attrs() / ContainerSnapshot.base_kwargs();
+  - a full main.handle_container_event() run against container
+    snapshots and a local stand-in STD server (tools/std_stub.py),
+    once with every interpreter evaluation a cache miss and once with
+    every evaluation served from the ObservationCache.
+
+Results are written as JSON so runs can be compared across versions:
+
+    python benchmarks/run.py                      # full run, JSON to stdout
+    python benchmarks/run.py --quick -o bench.json
+    python benchmarks/run.py --only interpreters
+
+Output shape:
+
+    {
+      "meta": {"python": ..., "platform": ..., "git_rev": ..., "started_at": ...},
+      "results": [
+        {"name": "interpreters.evaluate",
+         "params": {"labels": 150, "interpreters": 8},
+         "iterations": 2000,
+         "ops_per_sec": 5123.4,
+         "latency_us": {"mean": ..., "p50": ..., "p95": ..., "p99": ..., "max": ...}},
+        ...
+      ]
+    }
+
+Importing the notifier modules configures logging exactly as the
+notifier does, so `/config` must be writable (or run inside the
+container). Log output is raised to WARNING for the duration of the
+run so it does not dominate the measurements.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+os.environ.setdefault("NOTIFIER_LOG_TO_STDOUT", "0")
+
+import interpreter_loader  # noqa: E402
+import main  # noqa: E402
+from container_snapshot import ContainerSnapshot  # noqa: E402
+from notifiers import service_tracker_dashboard  # noqa: E402
+from tools.std_stub import start_stub_server  # noqa: E402
+
+BUILTIN_DIR = os.path.join(REPO_ROOT, "interpreters", "builtin")
+
+LABEL_COUNTS = (10, 50, 150)
+INTERPRETER_COUNTS = (2, 8, 32)
+QUICK_LABEL_COUNTS = (10, 150)
+QUICK_INTERPRETER_COUNTS = (2, 8)
+
+
+# ---------------------------------------------------------------------------
+# Harness
+# ---------------------------------------------------------------------------
+
+def measure(name: str, fn, params: dict, min_seconds: float, min_iterations: int) -> dict:
+    """Call fn() repeatedly and return a result record with latency percentiles."""
+    for _ in range(max(min_iterations // 10, 5)):  # warm-up
+        fn()
+    samples = []
+    deadline = time.perf_counter() + min_seconds
+    while len(samples) < min_iterations or time.perf_counter() < deadline:
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    samples.sort()
+    total_s = sum(samples) / 1e9
+
+    def pct(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))] / 1000
+
+    return {
+        "name": name,
+        "params": params,
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / total_s, 1) if total_s else None,
+        "latency_us": {
+            "mean": round(statistics.fmean(samples) / 1000, 2),
+            "p50": round(pct(0.50), 2),
+            "p95": round(pct(0.95), 2),
+            "p99": round(pct(0.99), 2),
+            "max": round(samples[-1] / 1000, 2),
+        },
+    }
+
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+def traefik_labels(count: int) -> dict:
+    """`count` labels shaped like a Traefik-heavy compose service."""
+    labels = {
+        "com.docker.compose.project": "bench",
+        "dockernotifier.notifiers": "service-tracker-dashboard",
+        "dockernotifier.std.group": "Bench",
+        "dockernotifier.std.internal.health": "true",
+        "dockernotifier.std.sort.priority": "5",
+    }
+    fields = ("rule", "tls", "entrypoints", "service", "middlewares")
+    router = 0
+    while len(labels) < count:
+        for field in fields:
+            key = f"traefik.http.routers.r{router}.{field}"
+            labels[key] = f"Host(`r{router}.example.com`)" if field == "rule" else "true"
+            if len(labels) >= count:
+                break
+        router += 1
+    return labels
+
+
+def interpreter_set(count: int) -> list:
+    """The builtin interpreters plus synthetic clones up to `count`."""
+    base = list(interpreter_loader.load_interpreters(BUILTIN_DIR, "/nonexistent").interpreters)
+    docs = []
+    for i in range(max(count - len(base), 0)):
+        docs.append({
+            "name": f"synthetic{i}",
+            "match": {"any_label_key_matches": rf"tool{i}\.routers\.(?P<router>[^.]+)\.rule"},
+            "extract": {
+                "hostname": {"from_label": f"tool{i}.routers.{{router}}.rule"},
+                "tls": {"from_label": f"tool{i}.routers.{{router}}.tls", "coerce": "bool", "default": False},
+            },
+            "emit": {"layer": f"synthetic{i}", "hostname": "{hostname}", "tls": "{tls}"},
+        })
+    extra = [interpreter_loader._validate_and_compile(doc, "<bench>") for doc in docs]
+    return (base + extra)[:count]
+
+
+class FakeContainer:
+    """Just enough of docker-py's Container for ContainerSnapshot.from_container()."""
+
+    def __init__(self, index: int, labels: dict, networks: int = 2, ports: int = 4):
+        self.id = f"{index:064x}"
+        self.name = f"bench-{index}"
+        self.attrs = {
+            "Config": {
+                "Labels": labels,
+                "Image": "ghcr.io/example/bench:latest",
+                "ExposedPorts": {f"{8000 + p}/tcp": {} for p in range(ports)},
+            },
+            "State": {"Status": "running", "StartedAt": "2026-01-01T00:00:00.000000000Z"},
+            "NetworkSettings": {
+                "Networks": {
+                    f"net{n}": {"Aliases": [self.name, f"alias{n}"]} for n in range(networks)
+                },
+                "Ports": {
+                    f"{8000 + p}/tcp": [
+                        {"HostIp": "0.0.0.0", "HostPort": str(18000 + p)},
+                        {"HostIp": "::", "HostPort": str(18000 + p)},
+                    ]
+                    for p in range(ports)
+                },
+            },
+        }
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_interpreters(args) -> list:
+    out = []
+    label_counts = QUICK_LABEL_COUNTS if args.quick else LABEL_COUNTS
+    interp_counts = QUICK_INTERPRETER_COUNTS if args.quick else INTERPRETER_COUNTS
+    for n_interp in interp_counts:
+        plan = interpreter_loader.compile_plan(interpreter_set(n_interp))
+        for n_labels in label_counts:
+            labels = traefik_labels(n_labels)
+            out.append(measure(
+                "interpreters.evaluate",
+                lambda: interpreter_loader.evaluate(plan, labels),
+                {"labels": n_labels, "interpreters": len(plan)},
+                args.seconds, args.iterations,
+            ))
+    return out
+
+
+def bench_canonical(args) -> list:
+    snapshot = ContainerSnapshot.from_container(FakeContainer(0, traefik_labels(50)))
+    kwargs = {
+        **snapshot.base_kwargs("bench-host", "refresh"),
+        "stack_name": "bench",
+        "group": "Bench",
+        "internal.health": "true",
+        "sort.priority": "5",
+        "exposure_observations": [{"layer": "traefik", "hostname": "a.example.com", "tls": True}],
+        "timestamp": "2026-01-01T00:00:00",
+    }
+    return [measure(
+        "std._to_canonical", lambda: service_tracker_dashboard._to_canonical(kwargs),
+        {"keys": len(kwargs)}, args.seconds, args.iterations,
+    )]
+
+
+def bench_snapshot(args) -> list:
+    out = []
+    for networks, ports in ((1, 1), (4, 16)):
+        container = FakeContainer(0, traefik_labels(50), networks=networks, ports=ports)
+        snapshot = ContainerSnapshot.from_container(container)
+        params = {"networks": networks, "ports": ports, "bindings": ports * 2}
+        out.append(measure(
+            "snapshot.from_attrs",
+            lambda: ContainerSnapshot.from_attrs(container.attrs, container.id, container.name),
+            params, args.seconds, args.iterations,
+        ))
+        out.append(measure(
+            "snapshot.base_kwargs", lambda: snapshot.base_kwargs("bench-host", "refresh"),
+            params, args.seconds, args.iterations,
+        ))
+    return out
+
+
+def bench_handle_event(args) -> list:
+    server = start_stub_server()
+    saved_env = {k: os.environ.get(k) for k in ("STD_URL", "STD_API_TOKEN", "STD_CHANGE_DETECTION")}
+    os.environ["STD_URL"] = f"http://127.0.0.1:{server.server_port}"
+    os.environ["STD_API_TOKEN"] = "bench"
+    # Measure the full send path, not the change-detection shortcut.
+    os.environ["STD_CHANGE_DETECTION"] = "false"
+    saved_registry = main.INTERPRETERS
+    saved_cache = main.OBSERVATION_CACHE
+    main.INTERPRETERS = interpreter_loader.InterpreterRegistry(BUILTIN_DIR, "/nonexistent")
+    try:
+        out = []
+        for n_labels in (QUICK_LABEL_COUNTS if args.quick else LABEL_COUNTS):
+            containers = [
+                ContainerSnapshot.from_container(FakeContainer(i, traefik_labels(n_labels)))
+                for i in range(50)
+            ]
+            # "miss": a disabled cache, so every event runs the interpreters.
+            # "hit": the containers share one label set, so after the
+            # first event every evaluation is served from the cache.
+            for cache_mode, cache_size in (("miss", 0), ("hit", 1024)):
+                main.OBSERVATION_CACHE = interpreter_loader.ObservationCache(cache_size)
+                index = [0]
+
+                def run():
+                    container = containers[index[0] % len(containers)]
+                    index[0] += 1
+                    main.handle_container_event(container, "bench-host", action="start")
+
+                out.append(measure(
+                    "main.handle_container_event", run,
+                    {"labels": n_labels, "notifiers": ["service-tracker-dashboard"],
+                     "transport": "local-stub", "interpreter_cache": cache_mode},
+                    args.seconds, max(args.iterations // 10, 50),
+                ))
+        return out
+    finally:
+        main.INTERPRETERS = saved_registry
+        main.OBSERVATION_CACHE = saved_cache
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        server.shutdown()
+
+
+BENCHMARKS = {
+    "interpreters": bench_interpreters,
+    "canonical": bench_canonical,
+    "snapshot": bench_snapshot,
+    "handle_event": bench_handle_event,
+}
+
+
+def _git_rev() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main_cli(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the notifier hot paths")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="run only this benchmark group (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="fewer parameter combinations")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="minimum measuring time per case (default 1.0, 0.2 with --quick)")
+    parser.add_argument("--iterations", type=int, default=None,
+                        help="minimum iterations per case (default 1000, 200 with --quick)")
+    args = parser.parse_args(argv)
+    if args.seconds is None:
+        args.seconds = 0.2 if args.quick else 1.0
+    if args.iterations is None:
+        args.iterations = 200 if args.quick else 1000
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "git_rev": _git_rev(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "quick": args.quick,
+        },
+        "results": [],
+    }
+    for name in (args.only or BENCHMARKS):
+        print(f"running {name} ...", file=sys.stderr)
+        report["results"].extend(BENCHMARKS[name](args))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"wrote {len(report['results'])} result(s) to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
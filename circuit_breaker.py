@@ -0,0 +1,200 @@
+"""
+Per-endpoint circuit breakers for notifier targets.
+
+When a downstream endpoint is hard down, sending every event through
+the full retry chain only adds load and log noise. Each target
+(`scheme://host:port`) gets one breaker:
+
+  closed     requests flow; consecutive failures are counted.
+  open       after CIRCUIT_FAILURE_THRESHOLD consecutive failures.
+             Requests are short-circuited with `CircuitOpenError`
+             without touching the network, and notifiers divert them
+             to the outbox (see outbox.py).
+  half-open  once CIRCUIT_RESET_SECONDS have passed, a single probe
+             request is let through. Success closes the breaker;
+             failure re-opens it for another reset period.
+
+Each state change is logged once per endpoint, so an outage produces a
+handful of lines instead of an error per container.
+
+Only connection errors, timeouts and HTTP 5xx count as failures; a 4xx
+means the endpoint is up and rejecting that one request.
+
+Usage:
+
+    from circuit_breaker import get_breaker
+
+    breaker = get_breaker(url)
+    result = breaker.call(send_once, url, payload)   # may raise CircuitOpenError
+
+`retry.deliver(..., breaker=breaker)` checks the breaker before every
+attempt, including deferred retries.
+
+Environment variables:
+    CIRCUIT_FAILURE_THRESHOLD  Consecutive failures that open a breaker.
+                               Default 5. 0 disables circuit breaking.
+    CIRCUIT_RESET_SECONDS      How long a breaker stays open before a
+                               probe is allowed. Default 30.
+"""
+
+import threading
+import time
+import urllib.parse
+
+import requests
+
+import metrics
+from env_config import env_number
+from logging_setup import get_logger
+
+logger = get_logger("circuit_breaker")
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_SECONDS = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Request Timeout and Too Many Requests: worth sending again later.
+_TRANSIENT_CLIENT_STATUSES = {408, 429}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending when the endpoint's breaker is open."""
+
+
+class RequestRejected(requests.RequestException):
+    """The endpoint answered but refused the request (e.g. an API error in a 200 response)."""
+
+
+def is_breaker_failure(exc: BaseException) -> bool:
+    """True for errors that say the endpoint is down, not that one request was bad."""
+    if isinstance(exc, (CircuitOpenError, RequestRejected)):
+        return False
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code >= 500
+    return isinstance(exc, requests.RequestException)
+
+
+def is_rejection(exc: BaseException) -> bool:
+    """
+    True for `RequestRejected` and HTTP 4xx other than 408/429: the
+    endpoint is up and refused this request, so sending it again
+    unchanged cannot succeed.
+    """
+    if isinstance(exc, RequestRejected):
+        return True
+    if not isinstance(exc, requests.HTTPError) or exc.response is None:
+        return False
+    status = exc.response.status_code
+    return 400 <= status < 500 and status not in _TRANSIENT_CLIENT_STATUSES
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one endpoint."""
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_seconds: float = DEFAULT_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. In half-open, only one caller gets True."""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._rejected += 1
+        metrics.CIRCUIT_REJECTED.inc(endpoint=self.name)
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and 0 < self.failure_threshold <= self._failures
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def record(self, exc: BaseException = None) -> None:
+        """Record the outcome of an allowed request (`exc` is None on success)."""
+        if exc is None or not is_breaker_failure(exc):
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def call(self, fn, *args, **kwargs):
+        """Run `fn` through the breaker; raises CircuitOpenError when short-circuited."""
+        if not self.allow():
+            raise CircuitOpenError(f"circuit open for {self.name}")
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(e)
+            raise
+        self.record_success()
+        return result
+
+    def _transition(self, state: str) -> None:
+        previous, self.state = self.state, state
+        if state == OPEN:
+            logger.warning(
+                f"Circuit for {self.name} opened after {self._failures} consecutive failure(s); "
+                f"short-circuiting requests for {self.reset_seconds:g}s"
+            )
+        elif state == HALF_OPEN:
+            logger.info(f"Circuit for {self.name} half-open; sending one probe request")
+        elif previous != CLOSED:
+            logger.info(
+                f"Circuit for {self.name} closed; endpoint recovered "
+                f"({self._rejected} request(s) were short-circuited)"
+            )
+            self._rejected = 0
+
+
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+
+
+def endpoint_of(url: str) -> str:
+    """`https://std.local:8815/api/v1/register` -> `https://std.local:8815`."""
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """The shared breaker for the endpoint serving `url`."""
+    name = endpoint_of(url)
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=env_number("CIRCUIT_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD, int),
+                reset_seconds=env_number("CIRCUIT_RESET_SECONDS", DEFAULT_RESET_SECONDS, float),
+            )
+            _breakers[name] = breaker
+        return breaker
@@ -0,0 +1,171 @@
+"""
+Compact, immutable view of one container.
+
+An inspect document is tens of KB; the notifiers need a few hundred
+bytes of it. `ContainerSnapshot.from_attrs()` parses the inspect JSON
+once — notifier opt-ins, DNS labels, STD extras, networks, ports, state
+and image — and the store, the refresh loop, the interpreters and every
+notifier reuse the result until the next inspect replaces it. The raw
+document is not retained.
+
+Usage:
+
+    from container_snapshot import ContainerSnapshot
+
+    snapshot = ContainerSnapshot.from_attrs(client.containers.get(cid).attrs)
+    if "dns" in snapshot.notifiers:
+        hostname, zone, docker_domain = snapshot.dns
+    kwargs = snapshot.base_kwargs(docker_host, action)
+
+Collections are stored as tuples (and labels as a read-only mapping) so
+one snapshot can be shared between threads; `base_kwargs()` builds
+fresh lists for the notifier kwargs contract.
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import interpreter_loader
+from logging_setup import get_logger
+
+logger = get_logger("container_snapshot")
+
+NOTIFIERS_LABEL = "dockernotifier.notifiers"
+DNS_HOSTNAME_LABEL = "dockernotifier.dns.containerhostname"
+DNS_ZONE_LABEL = "dockernotifier.dns.containerzone"
+DNS_DOMAIN_LABEL = "dockernotifier.dns.dockerdomain"
+STD_LABEL_PREFIX = "dockernotifier.std."
+STACK_LABEL = "com.docker.compose.project"
+
+_EMPTY_LABELS = MappingProxyType({})
+
+
+def parse_notifiers(labels: Mapping) -> frozenset:
+    """Notifier names opted in via the `dockernotifier.notifiers` label."""
+    raw = (labels.get(NOTIFIERS_LABEL) or "").strip()
+    return frozenset(n.strip() for n in raw.split(",") if n.strip())
+
+
+def _parse_networks(attrs: dict) -> tuple:
+    network_settings = attrs.get("NetworkSettings") or {}
+    networks_raw = network_settings.get("Networks") or {}
+    return tuple(
+        (name, tuple((data.get("Aliases") or []) if isinstance(data, dict) else []))
+        for name, data in networks_raw.items()
+    )
+
+
+def _parse_exposed_ports(attrs: dict) -> tuple:
+    config = attrs.get("Config") or {}
+    return tuple((config.get("ExposedPorts") or {}).keys())
+
+
+def _parse_published_ports(attrs: dict) -> tuple:
+    network_settings = attrs.get("NetworkSettings") or {}
+    ports_raw = network_settings.get("Ports") or {}
+    out = []
+    for port_key, bindings in ports_raw.items():
+        if not bindings:
+            continue
+        try:
+            container_port_str, protocol = port_key.split("/", 1)
+            container_port = int(container_port_str)
+        except (ValueError, AttributeError):
+            logger.debug(f"Skipping malformed port key {port_key!r}")
+            continue
+        for binding in bindings:
+            if not isinstance(binding, dict):
+                continue
+            host_port_raw = binding.get("HostPort")
+            try:
+                host_port = int(host_port_raw)
+            except (TypeError, ValueError):
+                logger.debug(
+                    f"Skipping binding with non-integer HostPort={host_port_raw!r} for {port_key}"
+                )
+                continue
+            out.append((container_port, protocol, binding.get("HostIp", "") or "", host_port))
+    return tuple(out)
+
+
+@dataclass(frozen=True, slots=True)
+class ContainerSnapshot:
+    """What the notifiers need from one inspect of a container."""
+    id: str
+    name: str
+    status: Optional[str]
+    image: Optional[str]
+    started_at: Optional[str]
+    stack_name: Optional[str]
+    labels: Mapping
+    labels_fingerprint: bytes
+    notifiers: frozenset
+    # (containerhostname, containerzone, dockerdomain); any may be None.
+    dns: tuple
+    # `dockernotifier.std.*` labels with the prefix stripped.
+    std_extras: tuple
+    # ((network name, (alias, ...)), ...)
+    networks: tuple
+    # ("80/tcp", ...)
+    exposed_ports: tuple
+    # ((container_port, protocol, host_ip, host_port), ...)
+    published_ports: tuple
+
+    @classmethod
+    def from_attrs(cls, attrs: dict, container_id: str = None, name: str = None) -> "ContainerSnapshot":
+        """
+        Build a snapshot from a full inspect document (`container.attrs`).
+        `container_id` and `name` override the document's `Id` and `Name`.
+        """
+        config = attrs.get("Config") or {}
+        state = attrs.get("State") or {}
+        labels = MappingProxyType(dict(config["Labels"])) if config.get("Labels") else _EMPTY_LABELS
+        return cls(
+            id=container_id or attrs.get("Id"),
+            name=name or (attrs.get("Name") or "").lstrip("/"),
+            status=state.get("Status"),
+            image=config.get("Image"),
+            started_at=state.get("StartedAt"),
+            stack_name=labels.get(STACK_LABEL),
+            labels=labels,
+            labels_fingerprint=interpreter_loader.labels_fingerprint(labels),
+            notifiers=parse_notifiers(labels),
+            dns=(
+                labels.get(DNS_HOSTNAME_LABEL),
+                labels.get(DNS_ZONE_LABEL),
+                labels.get(DNS_DOMAIN_LABEL),
+            ),
+            std_extras=tuple(
+                (key[len(STD_LABEL_PREFIX):], value)
+                for key, value in labels.items()
+                if key.startswith(STD_LABEL_PREFIX)
+            ),
+            networks=_parse_networks(attrs),
+            exposed_ports=_parse_exposed_ports(attrs),
+            published_ports=_parse_published_ports(attrs),
+        )
+
+    @classmethod
+    def from_container(cls, container) -> "ContainerSnapshot":
+        """Build a snapshot from a docker-py Container (inspected, not sparse)."""
+        return cls.from_attrs(container.attrs, container.id, container.name)
+
+    def base_kwargs(self, docker_host: str, action: str, status: Optional[str] = None) -> dict:
+        """The common notifier kwargs contract (see docs/PRD.md §3.3)."""
+        return {
+            "container_name": self.name,
+            "container_id": self.id,
+            "docker_host": docker_host,
+            "docker_status": status or self.status,
+            "image_name": self.image,
+            "stack_name": self.stack_name,
+            "started_at": self.started_at,
+            "action": action,
+            "networks": [{"name": name, "aliases": list(aliases)} for name, aliases in self.networks],
+            "exposed_ports": list(self.exposed_ports),
+            "published_ports": [
+                {"container_port": port, "protocol": protocol, "host_ip": host_ip, "host_port": host_port}
+                for port, protocol, host_ip, host_port in self.published_ports
+            ],
+        }
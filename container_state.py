@@ -0,0 +1,214 @@
+"""
+In-memory container state store, kept current by the Docker event stream.
+
+The boot scan fills the store once: one sparse `containers.list()`
+for the IDs, then an inspect per container, which the caller can run
+on a thread pool. After that, every watched event re-inspects only the container it is
+about (`client.containers.get()`), and `destroy` drops it. The refresh
+sweep reads `running()` from memory instead of listing and inspecting
+every container through the Docker socket again.
+
+The store keeps a `ContainerSnapshot` per container (see
+`container_snapshot.py`), built once per inspect; the inspect document
+itself is dropped.
+
+Usage:
+
+    from container_state import ContainerStateStore
+
+    store = ContainerStateStore(client)
+    for container in store.load(max_workers=8):  # boot
+        ...
+    for cid in store.list_running():         # boot, inspecting per worker
+        snapshot = store.load_one(cid)
+    snapshot = store.apply_event(cid, action)    # live event
+    for container in store.running():        # refresh
+        ...
+
+`resync()` is a cheap safety net against drift (e.g. a missed event):
+one `containers.list(all=True, sparse=True)` call, which does not
+inspect, followed by targeted inspects only for containers that
+appeared, vanished, or changed state behind the store's back.
+
+With a `wants(labels)` predicate the store only tracks containers that
+could produce a notification. `load()` and `resync()` then decide from
+the labels in the sparse list and inspect only the wanted containers.
+On a host full of short-lived, un-opted-in containers (CI runners),
+those containers are never inspected.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import docker
+
+import profiling
+from container_snapshot import ContainerSnapshot
+from logging_setup import get_logger
+
+logger = get_logger("container_state")
+
+
+class ContainerStateStore:
+    """Thread-safe map of container ID -> ContainerSnapshot."""
+
+    def __init__(self, client, wants=None):
+        self.client = client
+        # labels -> bool; None tracks every container.
+        self.wants = wants
+        self._lock = threading.Lock()
+        self._containers: dict = {}
+        # IDs updated by live events during the boot scan; see load().
+        self._event_touched: set = set()
+        self._tracking = True
+
+    def list_running(self) -> list:
+        """IDs of the running containers the store wants; one sparse list, no inspects."""
+        return [
+            listed.id for listed in self.client.containers.list(sparse=True)
+            if self.wants is None or self.wants(_labels(listed.attrs))
+        ]
+
+    def load_one(self, container_id: str):
+        """
+        Inspect one container into the store; return its snapshot, or
+        None if it is gone.
+
+        Safe to call while events are already being applied: a container
+        an event has re-inspected or removed since the store was created
+        keeps the event's (newer) view, which is what is returned.
+        """
+        try:
+            with profiling.stage("docker.inspect"):
+                container = self.client.containers.get(container_id)
+        except docker.errors.NotFound:
+            return None
+        with profiling.stage("snapshot"):
+            snapshot = ContainerSnapshot.from_container(container)
+        with self._lock:
+            if container_id in self._event_touched:
+                return self._containers.get(container_id)
+            self._containers[container_id] = snapshot
+        return snapshot
+
+    def load(self, max_workers: int = 1) -> list:
+        """
+        Fill the store with the currently running containers, inspecting
+        up to `max_workers` at a time; return them.
+        """
+        container_ids = self.list_running()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="load") as executor:
+            containers = [c for c in executor.map(self.load_one, container_ids) if c is not None]
+        logger.info(f"Container state store loaded {len(containers)} running container(s)")
+        return containers
+
+    def apply_event(self, container_id: str, action: str):
+        """
+        Update the store for one Docker event.
+
+        Returns a snapshot of the freshly inspected container, or None when the
+        container is gone (`destroy`, or removed before we could
+        inspect it).
+        """
+        with self._lock:
+            if self._tracking:
+                self._event_touched.add(container_id)
+        if action == "destroy":
+            self.remove(container_id)
+            return None
+        try:
+            with profiling.stage("docker.inspect"):
+                container = self.client.containers.get(container_id)
+        except docker.errors.NotFound:
+            self.remove(container_id)
+            return None
+        with profiling.stage("snapshot"):
+            snapshot = ContainerSnapshot.from_container(container)
+        with self._lock:
+            self._containers[snapshot.id] = snapshot
+        return snapshot
+
+    def touched_by_event(self, container_id: str) -> bool:
+        """True if a live event has updated this container since the store was created."""
+        with self._lock:
+            return container_id in self._event_touched
+
+    def end_boot(self) -> None:
+        """Stop tracking event-touched IDs once the boot scan is done."""
+        with self._lock:
+            self._event_touched = set()
+            self._tracking = False
+
+    def get(self, container_id: str):
+        with self._lock:
+            return self._containers.get(container_id)
+
+    def get_running(self, container_id: str):
+        """The container if its last known state is `running`, else None."""
+        container = self.get(container_id)
+        if container is None or container.status != "running":
+            return None
+        return container
+
+    def remove(self, container_id: str) -> None:
+        with self._lock:
+            self._containers.pop(container_id, None)
+
+    def running(self) -> list:
+        """Containers whose last known state is `running`."""
+        with self._lock:
+            containers = list(self._containers.values())
+        return [c for c in containers if c.status == "running"]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._containers)
+
+    def resync(self):
+        """
+        Reconcile with the daemon using one sparse list + targeted inspects.
+
+        Returns the IDs of every container the daemon listed (wanted or
+        not), or None when the list call failed.
+        """
+        try:
+            listed = self.client.containers.list(all=True, sparse=True)
+        except docker.errors.APIError as e:
+            logger.warning(f"Container resync skipped; list failed: {e}")
+            return None
+        live = {
+            c.id: _status(c.attrs) for c in listed
+            if self.wants is None or self.wants(_labels(c.attrs))
+        }
+        with self._lock:
+            known = {cid: c.status for cid, c in self._containers.items()}
+
+        stale = [cid for cid in known if cid not in live]
+        changed = [
+            cid for cid, status in live.items()
+            if known.get(cid) != status and (cid in known or status == "running")
+        ]
+        for cid in stale:
+            self.remove(cid)
+        for cid in changed:
+            self.apply_event(cid, "resync")
+        if stale or changed:
+            logger.info(
+                f"Container resync: {len(changed)} re-inspected, {len(stale)} removed"
+            )
+        return {c.id for c in listed}
+
+
+def _labels(attrs: dict) -> dict:
+    """Container labels from a sparse list entry (or an inspect document)."""
+    if "Labels" in attrs:
+        return attrs.get("Labels") or {}
+    return (attrs.get("Config") or {}).get("Labels") or {}
+
+
+def _status(attrs: dict):
+    """Container status from a sparse list entry (or an inspect document)."""
+    state = attrs.get("State")
+    if isinstance(state, dict):
+        return state.get("Status")
+    return state
@@ -0,0 +1,115 @@
+"""
+Keyed delivery worker pool for docker-api-notifier.
+
+Decouples Docker event ingestion from notifier delivery. The event
+loop in `main.py` only parses events and calls `submit()`; the
+inspect + notifier calls run on a fixed pool of worker threads.
+
+Usage:
+
+    from delivery import KeyedWorkerPool
+
+    pool = KeyedWorkerPool(workers=4, queue_size=1000)
+    pool.start()
+    pool.submit(container_id, handle_fn, container_id, action)
+
+Ordering: every job is routed to a worker by hashing its key (the
+container ID), and each worker drains its own FIFO queue. Jobs for the
+same container therefore run in submission order on a single thread,
+while jobs for different containers run in parallel.
+
+Backpressure: each worker queue is bounded. When a queue is full,
+`submit()` blocks the caller, which slows reading of the Docker event
+stream instead of growing memory without limit.
+
+Errors raised by a job are logged and swallowed so one bad container
+never kills a worker.
+"""
+
+import queue
+import threading
+import zlib
+
+from logging_setup import get_logger
+
+logger = get_logger("delivery")
+
+# Defaults — overridable via constructor args (main.py reads env vars).
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 1000
+
+_STOP = object()
+
+
+class KeyedWorkerPool:
+    """Fixed pool of worker threads with per-key FIFO ordering."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 name: str = "delivery"):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        self.name = name
+        self._queues = [queue.Queue(maxsize=max(queue_size, 0)) for _ in range(workers)]
+        self._threads = []
+
+    @property
+    def workers(self) -> int:
+        return len(self._queues)
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        for index, q in enumerate(self._queues):
+            t = threading.Thread(
+                target=self._run,
+                args=(q,),
+                name=f"{self.name}-{index}",
+                daemon=True,
+            )
+            t.start()
+            self._threads.append(t)
+        logger.info(
+            f"Started {self.workers} {self.name} worker(s) "
+            f"(queue size {self._queues[0].maxsize or 'unbounded'} per worker)"
+        )
+
+    def submit(self, key: str, fn, *args, **kwargs) -> None:
+        """Queue fn(*args, **kwargs) on the worker that owns `key`."""
+        self._queue_for(key).put((fn, args, kwargs))
+
+    def depth(self) -> int:
+        """Total number of jobs waiting across all worker queues."""
+        return sum(q.qsize() for q in self._queues)
+
+    def join(self) -> None:
+        """Block until every queued job has been processed."""
+        for q in self._queues:
+            q.join()
+
+    def stop(self) -> None:
+        """Ask every worker to exit after draining its queue."""
+        for q in self._queues:
+            q.put(_STOP)
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+    def _queue_for(self, key: str) -> queue.Queue:
+        # crc32 rather than hash(): stable across processes, which keeps
+        # log lines ("worker N") comparable between restarts.
+        index = zlib.crc32(str(key).encode("utf-8")) % len(self._queues)
+        return self._queues[index]
+
+    def _run(self, q: queue.Queue) -> None:
+        while True:
+            item = q.get()
+            try:
+                if item is _STOP:
+                    return
+                fn, args, kwargs = item
+                try:
+                    fn(*args, **kwargs)
+                except Exception as e:
+                    logger.error(f"[{threading.current_thread().name}] job failed: {e}")
+            finally:
+                q.task_done()
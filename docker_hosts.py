@@ -0,0 +1,131 @@
+"""
+Docker endpoints watched by this notifier.
+
+By default the notifier watches the local daemon (`docker.from_env()`)
+under the host name from `/etc/host_hostname`. Setting
+`DOCKER_HOSTS_FILE` switches to multi-host mode: one notifier instance
+watches every endpoint listed in the file, each with its own event
+subscription, container store and refresh loop, while delivery
+workers, retries, the outbox and HTTP connection pools to STD and
+Technitium are shared.
+
+File format (YAML):
+
+    hosts:
+      - name: nas                          # reported as docker_host
+        url: unix:///var/run/docker.sock
+      - name: node2
+        url: tcp://10.0.0.12:2376
+        tls:
+          ca_cert: /certs/node2/ca.pem
+          client_cert: /certs/node2/cert.pem
+          client_key: /certs/node2/key.pem
+          verify: true                     # default true
+      - name: node3
+        url: ssh://deploy@node3.lan
+        use_ssh_client: true               # shell out to `ssh` instead of paramiko
+      - name: node4
+        url: tcp://10.0.0.14:2375
+        timeout: 30                        # API timeout in seconds (docker-py default 60)
+        version: "1.43"                    # skip API version negotiation at startup
+
+`name` must be unique: it is the `docker_host` value sent to every
+notifier and the key of the host's event cursor. Invalid entries are
+logged and skipped; a file with no usable entries is an error.
+Without `version`, docker-py asks the daemon for its API version when
+the client is created, so an endpoint that is unreachable at startup
+is skipped; with `version` set, the host is watched anyway and its
+event stream keeps reconnecting until the daemon answers.
+"""
+
+import os
+from dataclasses import dataclass
+
+import docker
+import yaml
+
+from logging_setup import get_logger
+
+logger = get_logger("docker_hosts")
+
+
+@dataclass
+class DockerHost:
+    """One watched Docker endpoint."""
+    name: str
+    client: object
+    url: str = "local"
+
+
+def local_host(name: str) -> DockerHost:
+    """The single-host default: the daemon from the environment."""
+    return DockerHost(name=name, client=docker.from_env())
+
+
+def _tls_config(spec):
+    if not spec:
+        return None
+    if spec is True:
+        return docker.tls.TLSConfig(verify=True)
+    client_cert = None
+    if spec.get("client_cert") or spec.get("client_key"):
+        client_cert = (spec.get("client_cert"), spec.get("client_key"))
+    return docker.tls.TLSConfig(
+        client_cert=client_cert,
+        ca_cert=spec.get("ca_cert"),
+        verify=spec.get("verify", True),
+    )
+
+
+def _client_for(entry: dict):
+    kwargs = {"base_url": entry["url"]}
+    tls = _tls_config(entry.get("tls"))
+    if tls is not None:
+        kwargs["tls"] = tls
+    if entry.get("use_ssh_client"):
+        kwargs["use_ssh_client"] = True
+    if entry.get("timeout"):
+        kwargs["timeout"] = int(entry["timeout"])
+    if entry.get("version"):
+        kwargs["version"] = str(entry["version"])
+    return docker.DockerClient(**kwargs)
+
+
+def load_hosts(path: str) -> list:
+    """Parse `path` and build one DockerHost per valid entry."""
+    with open(path, "r", encoding="utf-8") as f:
+        doc = yaml.safe_load(f) or {}
+    entries = doc.get("hosts") if isinstance(doc, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a top-level 'hosts' list")
+
+    hosts = []
+    seen = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("name") or not entry.get("url"):
+            logger.error(f"{path}: hosts[{index}] needs 'name' and 'url'; skipping")
+            continue
+        name = str(entry["name"])
+        if name in seen:
+            logger.error(f"{path}: duplicate host name {name!r}; skipping")
+            continue
+        try:
+            client = _client_for(entry)
+        except (docker.errors.DockerException, ValueError, TypeError) as e:
+            logger.error(f"{path}: could not create a client for {name} ({entry['url']}): {e}")
+            continue
+        seen.add(name)
+        hosts.append(DockerHost(name=name, client=client, url=entry["url"]))
+        logger.info(f"Watching Docker host {name} at {entry['url']}")
+
+    if not hosts:
+        raise ValueError(f"{path}: no usable Docker hosts")
+    return hosts
+
+
+def configured_hosts(default_name: str) -> list:
+    """Hosts from DOCKER_HOSTS_FILE when set, otherwise the local daemon."""
+    path = os.environ.get("DOCKER_HOSTS_FILE", "").strip()
+    if not path:
+        return [local_host(default_name)]
+    return load_hosts(path)
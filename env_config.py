@@ -0,0 +1,32 @@
+"""
+Numeric environment settings shared by the delivery modules.
+
+Usage:
+
+    from env_config import env_number
+
+    POOL_SIZE = env_number("HTTP_POOL_SIZE", 10, int)
+    TIMEOUT = env_number("HTTP_READ_TIMEOUT", 30.0)
+
+An unset or blank variable gives the default; a value that does not
+parse is logged once and also gives the default, so a typo in one
+setting never stops the notifier from starting.
+"""
+
+import os
+
+from logging_setup import get_logger
+
+logger = get_logger("env_config")
+
+
+def env_number(name: str, default, cast=float):
+    """`cast(os.environ[name])`, or `default` when unset, blank or invalid."""
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return cast(raw)
+    except ValueError:
+        logger.warning(f"Invalid value for {name}={raw!r}; using default {default}")
+        return default
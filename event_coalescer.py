@@ -0,0 +1,232 @@
+"""
+Per-container event coalescing and flap damping.
+
+Sits between Docker event ingestion and the delivery pool in
+`main.py`. A restart or crash loop emits kill/die/stop/start bursts;
+instead of dispatching each event, the coalescer holds a container's
+events until it has been quiet for `window` seconds (or `max_delay`
+seconds have passed since the first held event) and then dispatches
+once with the last action. Delivery re-inspects the container, so
+that single dispatch always carries the container's final state.
+
+A held `start` is only replaced by a later `die`, `stop` or `kill`.
+Notifiers that fire on `start` alone (DNS) would otherwise miss a
+start followed within the window by an `update` or `pause`.
+
+Usage:
+
+    from event_coalescer import EventCoalescer, FlapDamper
+
+    coalescer = EventCoalescer(dispatch, window=2.0, max_delay=10.0,
+                               damper=FlapDamper())
+    coalescer.start()
+    coalescer.offer(container_id, action, event_time)
+
+`dispatch(container_id, action, flapping, event_time)` is called from the
+coalescer's own thread and is expected to be cheap (enqueue onto the
+delivery pool). With `window <= 0`, `offer()` dispatches immediately.
+`event_time` is the Docker event's wall-clock time (epoch seconds) of
+the last merged event, or None for dispatches the coalescer makes on
+its own (released flapping containers); main.py uses it to measure
+delivery lag.
+
+`destroy` is never merged with earlier events: anything pending for
+the container is flushed first, so a die+destroy pair still reports
+the exited state before the container disappears.
+
+Flap damping follows the route-flap-damping idea from BGP: each
+`start` adds one unit of penalty to the container, and the penalty
+halves every `half_life` seconds. Once it reaches `suppress_at`, the
+container is considered flapping: a single dispatch with
+`flapping=True` is made so notifiers can report a summarized status,
+and further events are dropped. A container that keeps restarting
+keeps adding penalty (up to `max_penalty`), so it stays suppressed for
+longer. When the penalty decays below `reuse_at`, the container is
+released and its final state is dispatched normally.
+"""
+
+import threading
+import time
+
+from logging_setup import get_logger
+
+logger = get_logger("coalescer")
+
+# Actions that end a held `start`; anything else merges into it.
+STOP_ACTIONS = frozenset({"die", "stop", "kill"})
+
+DEFAULT_WINDOW_SECONDS = 2.0
+DEFAULT_MAX_DELAY_SECONDS = 10.0
+
+DEFAULT_HALF_LIFE_SECONDS = 60.0
+DEFAULT_SUPPRESS_AT = 4.0
+DEFAULT_REUSE_AT = 1.0
+DEFAULT_MAX_PENALTY = 16.0
+
+
+class FlapDamper:
+    """Exponentially decaying restart penalty per container."""
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE_SECONDS,
+                 suppress_at: float = DEFAULT_SUPPRESS_AT,
+                 reuse_at: float = DEFAULT_REUSE_AT,
+                 max_penalty: float = DEFAULT_MAX_PENALTY):
+        self.half_life = half_life
+        self.suppress_at = suppress_at
+        self.reuse_at = reuse_at
+        self.max_penalty = max_penalty
+        self._lock = threading.Lock()
+        # container_id -> [penalty, updated_at, suppressed]
+        self._state: dict = {}
+
+    def record(self, container_id: str, action: str) -> None:
+        """Account for one event; only `start` adds penalty."""
+        if action == "destroy":
+            self.forget(container_id)
+            return
+        if action != "start":
+            return
+        now = time.monotonic()
+        with self._lock:
+            entry = self._state.setdefault(container_id, [0.0, now, False])
+            entry[0] = min(self._decayed(entry, now) + 1.0, self.max_penalty)
+            entry[1] = now
+
+    def check(self, container_id: str) -> str:
+        """
+        Return "normal", "flapping" (just crossed the suppress threshold —
+        dispatch a summary once) or "suppressed" (drop).
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._state.get(container_id)
+            if entry is None:
+                return "normal"
+            penalty = self._decayed(entry, now)
+            if entry[2]:
+                return "suppressed"
+            if penalty >= self.suppress_at:
+                entry[2] = True
+                logger.warning(
+                    f"Container {container_id[:12]} is flapping "
+                    f"(penalty {penalty:.1f}); suppressing notifications"
+                )
+                return "flapping"
+            return "normal"
+
+    def is_suppressed(self, container_id: str) -> bool:
+        with self._lock:
+            entry = self._state.get(container_id)
+            return bool(entry and entry[2])
+
+    def release_ready(self) -> list:
+        """
+        Un-suppress containers whose penalty decayed below `reuse_at` and
+        drop fully decayed entries. Returns the released container IDs.
+        """
+        now = time.monotonic()
+        released = []
+        with self._lock:
+            for container_id, entry in list(self._state.items()):
+                penalty = self._decayed(entry, now)
+                if entry[2] and penalty < self.reuse_at:
+                    entry[2] = False
+                    released.append(container_id)
+                    logger.info(
+                        f"Container {container_id[:12]} stopped flapping; resuming notifications"
+                    )
+                if not entry[2] and penalty < 0.05:
+                    del self._state[container_id]
+        return released
+
+    def forget(self, container_id: str) -> None:
+        with self._lock:
+            self._state.pop(container_id, None)
+
+    def _decayed(self, entry: list, now: float) -> float:
+        if self.half_life <= 0:
+            return entry[0]
+        return entry[0] * 0.5 ** ((now - entry[1]) / self.half_life)
+
+
+class EventCoalescer:
+    """Debounces per-container events before handing them to `dispatch`."""
+
+    def __init__(self, dispatch, window: float = DEFAULT_WINDOW_SECONDS,
+                 max_delay: float = DEFAULT_MAX_DELAY_SECONDS, damper: FlapDamper = None):
+        self.dispatch = dispatch
+        self.window = window
+        self.max_delay = max(max_delay, window)
+        self.damper = damper
+        self._lock = threading.Lock()
+        # container_id -> [last_action, first_seen, last_seen, last_event_time]
+        self._pending: dict = {}
+        self._thread = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.window <= 0 and self.damper is None:
+            return
+        self._thread = threading.Thread(target=self._run, name="coalescer", daemon=True)
+        self._thread.start()
+
+    def offer(self, container_id: str, action: str, event_time: float = None) -> None:
+        if self.damper is not None:
+            self.damper.record(container_id, action)
+        if self.window <= 0:
+            self._emit(container_id, action, event_time)
+            return
+        now = time.monotonic()
+        flush_first = None
+        with self._lock:
+            entry = self._pending.get(container_id)
+            if action == "destroy" and entry is not None:
+                flush_first = entry
+                entry = None
+            if entry is None:
+                self._pending[container_id] = [action, now, now, event_time]
+            else:
+                if entry[0] != "start" or action in STOP_ACTIONS:
+                    entry[0] = action
+                entry[2] = now
+                entry[3] = event_time
+        if flush_first is not None:
+            self._emit(container_id, flush_first[0], flush_first[3])
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self) -> None:
+        tick = max(min(self.window / 4, 0.5), 0.05) if self.window > 0 else 1.0
+        while True:
+            time.sleep(tick)
+            try:
+                self._flush_due()
+            except Exception as e:
+                logger.error(f"Coalescer flush failed: {e}")
+
+    def _flush_due(self) -> None:
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for container_id, (action, first_seen, last_seen, event_time) in list(self._pending.items()):
+                if now - last_seen >= self.window or now - first_seen >= self.max_delay:
+                    due.append((container_id, action, event_time))
+                    del self._pending[container_id]
+        for container_id, action, event_time in due:
+            self._emit(container_id, action, event_time)
+        if self.damper is not None:
+            for container_id in self.damper.release_ready():
+                self.dispatch(container_id, "refresh", False, None)
+
+    def _emit(self, container_id: str, action: str, event_time: float = None) -> None:
+        if self.damper is None or action == "destroy":
+            self.dispatch(container_id, action, False, event_time)
+            return
+        verdict = self.damper.check(container_id)
+        if verdict == "suppressed":
+            logger.debug(f"Dropping {action} for flapping container {container_id[:12]}")
+            return
+        self.dispatch(container_id, action, verdict == "flapping", event_time)
@@ -0,0 +1,179 @@
+"""
+Resumable Docker event subscription.
+
+`EventStream` owns the `client.events()` subscription for one Docker
+host. It records how far it has read in an `EventCursor` (persisted
+under /config), and when the stream raises or ends — the daemon
+restarted, the socket went away — it reconnects with exponential
+backoff and resubscribes with `since=` so the events it missed are
+replayed instead of lost.
+
+Usage:
+
+    from event_stream import EventCursor, EventStream
+
+    cursor = EventCursor(JsonStateStore("/config/event_cursor.json"), docker_host)
+    stream = EventStream(client, handle_event, cursor, on_reconnect=resync)
+    threading.Thread(target=stream.run, args=(cursor.resume_point(max_gap),)).start()
+    stream.connected.wait()
+    ...
+    stream.heartbeat()        # periodically, e.g. after each refresh sweep
+
+The daemon only keeps a bounded buffer of recent events, so replay is
+trusted only when the outage was short: `resume_point(max_gap)`
+returns None once the cursor is older than `max_gap` seconds, and the
+caller falls back to a full rescan. `on_reconnect(resumed)` is called
+after every reconnection (on its own thread) with `resumed=False` in
+that case.
+
+Resubscription starts `RESUME_OVERLAP_SECONDS` before the last event
+read, so events that were read but still waiting in the coalescer or
+the delivery queue when the stream broke are delivered again.
+Replayed duplicates are harmless: delivery re-inspects the container
+and both notifiers' writes are idempotent.
+"""
+
+import threading
+import time
+
+import docker
+import requests
+
+from logging_setup import get_logger
+
+logger = get_logger("event_stream")
+
+RESUME_OVERLAP_SECONDS = 30
+DEFAULT_MAX_GAP_SECONDS = 600
+BACKOFF_MIN_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+_STREAM_ERRORS = (docker.errors.DockerException, requests.RequestException, OSError)
+
+
+class EventCursor:
+    """
+    Last event read and last time the stream was known healthy, for one host.
+
+    Stored in a `JsonStateStore` as `{"time_nano": int, "alive_at": float}`
+    under the host's key; `alive_at` keeps a quiet but healthy host's
+    cursor fresh, so a restart after an hour without events still resumes.
+    """
+
+    def __init__(self, store, key: str):
+        self.store = store
+        self.key = key
+        entry = store.get(key)
+        entry = entry if isinstance(entry, dict) else {}
+        self._time_nano = entry.get("time_nano")
+        self._alive_at = entry.get("alive_at")
+
+    def advance(self, event: dict) -> None:
+        time_nano = event.get("timeNano") or (event.get("time") or 0) * 10**9
+        if time_nano and (self._time_nano is None or time_nano > self._time_nano):
+            self._time_nano = time_nano
+        self.touch()
+
+    def touch(self) -> None:
+        """Mark the stream healthy as of now."""
+        self._alive_at = time.time()
+        self.store.set(self.key, {"time_nano": self._time_nano, "alive_at": self._alive_at})
+
+    def resume_point(self, max_gap: float):
+        """
+        The `since` value (epoch seconds string) to resubscribe from, or
+        None when there is no cursor or it is older than `max_gap` seconds.
+        """
+        if self._alive_at is None or time.time() - self._alive_at > max_gap:
+            return None
+        if self._time_nano:
+            since_nano = self._time_nano - RESUME_OVERLAP_SECONDS * 10**9
+        else:
+            since_nano = int((self._alive_at - RESUME_OVERLAP_SECONDS) * 10**9)
+        return f"{since_nano // 10**9}.{since_nano % 10**9:09d}"
+
+    def flush(self) -> None:
+        self.store.flush()
+
+
+class EventStream:
+    """Reconnecting `client.events()` reader for one Docker host."""
+
+    def __init__(self, client, handle, cursor: EventCursor, on_reconnect=None,
+                 max_gap: float = DEFAULT_MAX_GAP_SECONDS, name: str = "docker", filters=None):
+        self.client = client
+        # Passed to the events API so the daemon drops unwanted events.
+        self.filters = filters
+        self.handle = handle
+        self.cursor = cursor
+        self.on_reconnect = on_reconnect
+        self.max_gap = max_gap
+        self.name = name
+        # Set once the first subscription is live.
+        self.connected = threading.Event()
+        self._live = False
+
+    def run(self, since=None) -> None:
+        """Read events forever, reconnecting as needed. `since` resumes the first subscription."""
+        failures = 0
+        first = True
+        while True:
+            try:
+                events = self.client.events(decode=True, since=since, filters=self.filters)
+            except _STREAM_ERRORS as e:
+                failures += 1
+                self._backoff(failures, f"Could not subscribe to {self.name} events: {e}")
+                since = self.cursor.resume_point(self.max_gap)
+                continue
+
+            if since is not None:
+                logger.info(f"Subscribed to {self.name} events, replaying since {since}")
+            else:
+                logger.info(f"Subscribed to {self.name} events")
+            self.cursor.touch()
+            if not first and self.on_reconnect is not None:
+                threading.Thread(
+                    target=self._notify_reconnect, args=(since is not None,),
+                    name=f"{self.name}-reconnect", daemon=True,
+                ).start()
+            first = False
+            self._live = True
+            self.connected.set()
+
+            try:
+                for event in events:
+                    # Only a stream that actually delivers resets the backoff.
+                    failures = 0
+                    self.handle(event)
+                    self.cursor.advance(event)
+                reason = "stream ended"
+            except _STREAM_ERRORS as e:
+                reason = str(e)
+            finally:
+                self._live = False
+                self.cursor.touch()
+            failures += 1
+            self._backoff(failures, f"{self.name} event stream lost ({reason})")
+            since = self.cursor.resume_point(self.max_gap)
+            if since is None:
+                logger.warning(
+                    f"{self.name} event stream was down longer than {self.max_gap:g}s; "
+                    f"a full rescan will run after reconnecting"
+                )
+
+    def heartbeat(self) -> None:
+        """Refresh and persist the cursor while the stream is up (called each refresh sweep)."""
+        if self._live:
+            self.cursor.touch()
+        self.cursor.flush()
+
+    def _notify_reconnect(self, resumed: bool) -> None:
+        try:
+            self.on_reconnect(resumed)
+        except Exception as e:
+            logger.error(f"Reconnect handling for {self.name} failed: {e}")
+
+    def _backoff(self, failures: int, message: str) -> None:
+        delay = min(BACKOFF_MIN_SECONDS * 2 ** (failures - 1), BACKOFF_MAX_SECONDS)
+        logger.warning(f"{message}; reconnecting in {delay:g}s")
+        time.sleep(delay)
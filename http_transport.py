@@ -0,0 +1,129 @@
+"""
+Shared HTTP transport for notifier modules.
+
+Gives each notifier a persistent `requests.Session` with a pooled,
+keep-alive connection adapter and a default (connect, read) timeout,
+so consecutive calls to the same endpoint reuse the TCP/TLS
+connection and a hung peer can never block a caller forever.
+
+Usage from any notifier module:
+
+    import retry
+    from http_transport import get_session
+
+    _session = get_session("std")
+
+    def _send_once(endpoint, payload, headers):
+        response = _session.post(endpoint, json=payload, headers=headers)
+        response.raise_for_status()
+        return response
+
+    retry.deliver(key, _send_once, (endpoint, payload, headers), ...)
+
+Any call that passes its own `timeout=` keeps it; otherwise the
+default from the environment applies. A timeout raises
+`requests.Timeout`, which is a `RequestException` and therefore
+retried by `retry.deliver()` like any other transient failure.
+
+Environment variables:
+    HTTP_POOL_SIZE        Max keep-alive connections per endpoint. Default 10.
+    HTTP_CONNECT_TIMEOUT  Seconds to establish a connection. Default 5.
+    HTTP_READ_TIMEOUT     Seconds to wait for response data. Default 30.
+
+`connection_stats()` reports, per endpoint, how many requests were
+sent and how many new connections were opened for them; the
+difference is the number of requests served by a reused connection.
+"""
+
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from env_config import env_number
+from logging_setup import get_logger
+
+logger = get_logger("http_transport")
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+
+POOL_SIZE = max(1, env_number("HTTP_POOL_SIZE", DEFAULT_POOL_SIZE, int))
+CONNECT_TIMEOUT = env_number("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT, float)
+READ_TIMEOUT = env_number("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT, float)
+
+
+class NotifierSession(requests.Session):
+    """`requests.Session` that applies a default timeout to every request."""
+
+    def __init__(self, name: str, pool_size: int, timeout: tuple):
+        super().__init__()
+        self.name = name
+        self.default_timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+        self.adapter = adapter
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.default_timeout)
+        return super().request(method, url, **kwargs)
+
+
+_sessions: dict = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name: str) -> NotifierSession:
+    """Return the shared session for `name`, creating it on first use."""
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = NotifierSession(name, POOL_SIZE, (CONNECT_TIMEOUT, READ_TIMEOUT))
+            _sessions[name] = session
+        return session
+
+
+def connection_stats() -> dict:
+    """
+    Per-endpoint connection reuse across all sessions.
+
+    Returns `{"<session>": {"<scheme>://<host>:<port>": {"requests": int,
+    "connections": int, "reused": int}}}`. Counters come from the
+    underlying urllib3 pools and cover pools that are still alive.
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+    out = {}
+    for session in sessions:
+        pools = session.adapter.poolmanager.pools
+        per_endpoint = {}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            endpoint = f"{key.key_scheme}://{key.key_host}:{key.key_port}"
+            requests_sent = pool.num_requests
+            connections = pool.num_connections
+            per_endpoint[endpoint] = {
+                "requests": requests_sent,
+                "connections": connections,
+                "reused": max(requests_sent - connections, 0),
+            }
+        out[session.name] = per_endpoint
+    return out
+
+
+def log_connection_stats() -> None:
+    """Emit connection_stats() at debug level, one line per endpoint."""
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    for name, endpoints in connection_stats().items():
+        for endpoint, stats in endpoints.items():
+            logger.debug(
+                f"[{name}] {endpoint}: {stats['requests']} request(s) over "
+                f"{stats['connections']} connection(s), {stats['reused']} reused"
+            )
@@ -8,7 +8,9 @@ format reference.
 
 Public surface:
     load_interpreters() -> LoadResult
-    evaluate(interpreters, labels) -> list[dict]
+    compile_plan(interpreters) -> EvaluationPlan
+    evaluate(plan_or_interpreters, labels) -> list[dict]
+    ObservationCache(maxsize).evaluate(load_result, labels) -> list[dict]
 
 The module is named `interpreter_loader` (not `interpreters`) to
 avoid a name collision with the on-disk `interpreters/builtin/` and
@@ -22,13 +24,22 @@ indicating whether any directory was even searched / loaded — this
 distinguishes "interpreters ran and nothing matched" (empty list on
 the wire) from "interpreters disabled" (null on the wire).
 
+At load time the interpreters are also compiled into an
+EvaluationPlan (`LoadResult.plan`): label-key matching is indexed by
+each pattern's literal prefix and `extract`/`emit` templates are
+pre-parsed, so per-event evaluation does no template parsing.
+
 `evaluate()` is called per container event with the container's
 labels dict. It runs every loaded interpreter against the labels and
 returns the union of their emitted observations.
 """
 
+import hashlib
+import itertools
 import os
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
@@ -43,6 +54,10 @@ USER_DIR = "/app/interpreters/user"
 
 _TRUTHY = {"true", "1", "yes"}
 
+# Every LoadResult gets the next value; caches keyed on it are
+# invalidated automatically when interpreters are reloaded.
+_versions = itertools.count(1)
+
 
 @dataclass
 class ExtractSpec:
@@ -68,10 +83,23 @@ class Interpreter:
     source_path: str = ""
 
 
-@dataclass
+@dataclass(frozen=True)
 class LoadResult:
-    interpreters: list  # list[Interpreter]
+    """
+    One immutable interpreter set. Reloads build a new LoadResult and
+    swap it in; an existing instance is never modified.
+    """
+    interpreters: tuple  # tuple[Interpreter]
     directories_searched: bool  # True if either builtin/user dir was found
+    plan: Any = None  # EvaluationPlan; compiled from `interpreters` if not given
+    version: int = 0  # unique per load; assigned if not given
+
+    def __post_init__(self):
+        object.__setattr__(self, "interpreters", tuple(self.interpreters))
+        if self.plan is None:
+            object.__setattr__(self, "plan", compile_plan(self.interpreters))
+        if not self.version:
+            object.__setattr__(self, "version", next(_versions))
 
     @property
     def any_loaded(self) -> bool:
@@ -93,59 +121,172 @@ def load_interpreters(
     override the builtin. Invalid files log a warning and are
     skipped; the loader continues with the rest.
     """
-    by_name: dict = {}
-    directories_searched = False
+    return InterpreterRegistry(builtin_dir, user_dir).current
 
-    if os.path.isdir(builtin_dir):
-        directories_searched = True
-        for interp in _load_dir(builtin_dir, "builtin"):
-            by_name[interp.name] = interp
 
-    if os.path.isdir(user_dir):
-        directories_searched = True
-        for interp in _load_dir(user_dir, "user"):
-            if interp.name in by_name:
+@dataclass(frozen=True)
+class _FileState:
+    """What the registry last loaded from one YAML file."""
+    signature: tuple  # (mtime_ns, size)
+    digest: str
+    source_label: str  # "builtin" or "user"
+    interpreter: Optional[Interpreter]  # None if the file was invalid
+
+
+class InterpreterRegistry:
+    """
+    Holds the current LoadResult and reloads it when YAML files change.
+
+    `current` always points at a complete, validated LoadResult; readers
+    just take the reference, no locking needed. `reload_if_changed()`
+    stats every YAML file, re-reads only files whose (mtime, size)
+    changed, and re-parses only those whose content hash changed. If any
+    changed file fails to parse or validate, the whole reload is
+    rejected and the last good set stays in place; the rejection is
+    logged once and retried when the files change again. Otherwise a new
+    LoadResult is built and swapped in atomically.
+
+    The initial load is tolerant, like `load_interpreters()`: invalid
+    files are logged and skipped.
+    """
+
+    def __init__(self, builtin_dir: str = BUILTIN_DIR, user_dir: str = USER_DIR):
+        self.builtin_dir = builtin_dir
+        self.user_dir = user_dir
+        self._lock = threading.Lock()
+        self._files: dict = {}  # path -> _FileState
+        self._rejected_snapshot = None
+        self.current = self._initial_load()
+
+    def reload_if_changed(self) -> bool:
+        """Swap in a new interpreter set if any YAML changed. Returns True if swapped."""
+        with self._lock:
+            listing, directories_searched = self._scan()
+            snapshot = {path: sig for path, (sig, _label) in listing.items()}
+            if snapshot == {path: st.signature for path, st in self._files.items()} \
+               and directories_searched == self.current.directories_searched:
+                return False
+            if snapshot == self._rejected_snapshot:
+                return False
+
+            files = {}
+            changed = []
+            for path, (signature, source_label) in listing.items():
+                previous = self._files.get(path)
+                if previous is not None and previous.signature == signature:
+                    files[path] = previous
+                    continue
+                try:
+                    raw = _read_bytes(path)
+                except OSError as e:
+                    return self._reject(snapshot, f"could not read {path}: {e}")
+                digest = hashlib.sha1(raw).hexdigest()
+                if previous is not None and previous.digest == digest:
+                    files[path] = _FileState(signature, digest, source_label, previous.interpreter)
+                    continue
+                interp = _parse_and_compile(raw, path, source_label)
+                if interp is None:
+                    return self._reject(snapshot, f"{path} is invalid")
+                files[path] = _FileState(signature, digest, source_label, interp)
+                changed.append(path)
+            removed = [path for path in self._files if path not in files]
+
+            self._files = files
+            self._rejected_snapshot = None
+            if not changed and not removed \
+               and directories_searched == self.current.directories_searched:
+                return False  # only timestamps moved
+            for path in changed:
+                logger.info(f"Interpreter file changed: {path}")
+            for path in removed:
+                logger.info(f"Interpreter file removed: {path}")
+            self.current = self._assemble(directories_searched)
+            return True
+
+    def _initial_load(self) -> LoadResult:
+        listing, directories_searched = self._scan()
+        for path, (signature, source_label) in listing.items():
+            try:
+                raw = _read_bytes(path)
+            except OSError as e:
+                logger.warning(f"Failed to read {source_label} interpreter {path}: {e}")
+                continue
+            interp = _parse_and_compile(raw, path, source_label)
+            digest = hashlib.sha1(raw).hexdigest()
+            self._files[path] = _FileState(signature, digest, source_label, interp)
+        return self._assemble(directories_searched)
+
+    def _reject(self, snapshot: dict, reason: str) -> bool:
+        logger.warning(f"Interpreter reload rejected ({reason}); keeping the last good interpreter set")
+        self._rejected_snapshot = snapshot
+        return False
+
+    def _scan(self):
+        """Return ({path: (signature, source_label)}, directories_searched) in load order."""
+        listing = {}
+        directories_searched = False
+        for path, source_label in ((self.builtin_dir, "builtin"), (self.user_dir, "user")):
+            if not os.path.isdir(path):
+                continue
+            directories_searched = True
+            try:
+                entries = sorted(os.listdir(path))
+            except OSError as e:
+                logger.warning(f"Could not list interpreter dir {path}: {e}")
+                continue
+            for entry in entries:
+                if not (entry.endswith(".yml") or entry.endswith(".yaml")):
+                    continue
+                full = os.path.join(path, entry)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                listing[full] = ((st.st_mtime_ns, st.st_size), source_label)
+        return listing, directories_searched
+
+    def _assemble(self, directories_searched: bool) -> LoadResult:
+        """Combine per-file interpreters (user overrides builtin) into a LoadResult."""
+        by_name: dict = {}
+        for state in self._files.values():
+            interp = state.interpreter
+            if interp is None:
+                continue
+            if state.source_label == "user" and interp.name in by_name:
                 logger.info(
                     f"[interpreter:{interp.name}] user file {interp.source_path} "
                     f"overrides builtin"
                 )
             by_name[interp.name] = interp
 
-    interpreters = sorted(by_name.values(), key=lambda i: i.name)
-    if interpreters:
-        names = ", ".join(i.name for i in interpreters)
-        logger.info(f"Loaded {len(interpreters)} interpreter(s): {names}")
-    elif directories_searched:
-        logger.info("No interpreters loaded (directories present but empty or all invalid)")
-    else:
-        logger.info("No interpreters loaded (no interpreter directories present)")
+        interpreters = sorted(by_name.values(), key=lambda i: i.name)
+        if interpreters:
+            names = ", ".join(i.name for i in interpreters)
+            logger.info(f"Loaded {len(interpreters)} interpreter(s): {names}")
+        elif directories_searched:
+            logger.info("No interpreters loaded (directories present but empty or all invalid)")
+        else:
+            logger.info("No interpreters loaded (no interpreter directories present)")
+
+        return LoadResult(
+            interpreters=interpreters,
+            directories_searched=directories_searched,
+        )
 
-    return LoadResult(
-        interpreters=interpreters,
-        directories_searched=directories_searched,
-    )
 
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
 
-def _load_dir(path: str, source_label: str):
-    """Yield validated Interpreter objects from every *.yml file in path."""
+
+def _parse_and_compile(raw: bytes, path: str, source_label: str) -> Optional[Interpreter]:
+    """Parse and validate one YAML file; None (after logging why) if it is unusable."""
     try:
-        entries = sorted(os.listdir(path))
-    except OSError as e:
-        logger.warning(f"Could not list interpreter dir {path}: {e}")
-        return
-    for entry in entries:
-        if not (entry.endswith(".yml") or entry.endswith(".yaml")):
-            continue
-        full = os.path.join(path, entry)
-        try:
-            with open(full, "r", encoding="utf-8") as f:
-                doc = yaml.safe_load(f)
-        except (OSError, yaml.YAMLError) as e:
-            logger.warning(f"Failed to read {source_label} interpreter {full}: {e}")
-            continue
-        interp = _validate_and_compile(doc, full)
-        if interp is not None:
-            yield interp
+        doc = yaml.safe_load(raw.decode("utf-8"))
+    except (UnicodeDecodeError, yaml.YAMLError) as e:
+        logger.warning(f"Failed to read {source_label} interpreter {path}: {e}")
+        return None
+    return _validate_and_compile(doc, path)
 
 
 def _validate_and_compile(doc: Any, source_path: str) -> Optional[Interpreter]:
@@ -286,6 +427,262 @@ def _compile_extract(interp_name: str, var_name: str, spec: Any) -> Optional[Ext
     )
 
 
+# ---------------------------------------------------------------------------
+# Compilation into an evaluation plan
+# ---------------------------------------------------------------------------
+
+_FIELD_NAME_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+# Characters that end the literal prefix of a regex.
+_REGEX_META = set(".^$*+?{}[]|()\\")
+# Quantifiers that make the preceding literal character optional.
+_OPTIONAL_QUANTIFIERS = set("*?{")
+
+
+def _literal_prefix(pattern: str) -> str:
+    """
+    Return a string every `fullmatch` of `pattern` must start with.
+
+    Conservative: escaped punctuation (`\\.`) counts as literal, the
+    scan stops at the first metacharacter, and a character followed by
+    an optional quantifier is dropped. Patterns containing `|` get an
+    empty prefix, since a top-level alternation can match anything.
+    """
+    if "|" in pattern:
+        return ""
+    out = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                literal, i = pattern[i + 1], i + 2
+            else:
+                break  # character class escape like \d, \w, \b
+        elif ch in _REGEX_META:
+            break
+        else:
+            literal, i = ch, i + 1
+        if i < len(pattern) and pattern[i] in _OPTIONAL_QUANTIFIERS:
+            break
+        out.append(literal)
+    return "".join(out)
+
+
+def _parse_template(template: str) -> list:
+    """Split a `{name}` template into literal strings and ("ref", name) tuples."""
+    parts = []
+    last = 0
+    for m in _FIELD_NAME_RE.finditer(template):
+        if m.start() > last:
+            parts.append(template[last:m.start()])
+        parts.append(("ref", m.group(1)))
+        last = m.end()
+    if last < len(template):
+        parts.append(template[last:])
+    return parts
+
+
+def _compile_label_template(template: str):
+    """
+    Pre-parse an `extract.from_label` template into a render function
+    `render(captures) -> str`.
+
+    The function raises KeyError if a referenced capture is missing or
+    None — the caller falls back to the extract spec's default.
+    """
+    parts = _parse_template(template)
+    if not any(isinstance(p, tuple) for p in parts):
+        return lambda captures: template
+
+    def render(captures):
+        out = []
+        for part in parts:
+            if isinstance(part, tuple):
+                val = captures.get(part[1])
+                if val is None:
+                    raise KeyError(part[1])
+                out.append(str(val))
+            else:
+                out.append(part)
+        return "".join(out)
+    return render
+
+
+def _compile_emit(value: Any):
+    """
+    Pre-parse a value from the `emit` section into a render function
+    `render(local_vars, interp_name) -> Any`.
+
+    String leaves substitute `{var}` placeholders against local_vars:
+      - a leaf that is exactly `{name}` returns `local_vars[name]`
+        verbatim (preserves bools, ints, lists, and None);
+      - a reference to a var missing from local_vars logs a debug
+        message and resolves to None;
+      - in a partial/multi-placeholder string, any None var makes the
+        whole field None (null propagation).
+    Dicts and lists are rebuilt on every render; other scalars are
+    returned as-is.
+    """
+    if isinstance(value, dict):
+        items = [(k, _compile_emit(v)) for k, v in value.items()]
+        return lambda local_vars, interp_name: {
+            k: render(local_vars, interp_name) for k, render in items
+        }
+    if isinstance(value, list):
+        renders = [_compile_emit(v) for v in value]
+        return lambda local_vars, interp_name: [
+            render(local_vars, interp_name) for render in renders
+        ]
+    if not isinstance(value, str):
+        return lambda local_vars, interp_name: value
+
+    parts = _parse_template(value)
+    refs = [p for p in parts if isinstance(p, tuple)]
+    if not refs:
+        return lambda local_vars, interp_name: value
+
+    if len(parts) == 1:
+        name = refs[0][1]
+
+        def render_bare(local_vars, interp_name):
+            if name not in local_vars:
+                logger.debug(
+                    f"[interpreter:{interp_name}] emit template references unknown var {{{name}}}"
+                )
+                return None
+            return local_vars[name]
+        return render_bare
+
+    def render_parts(local_vars, interp_name):
+        out = []
+        for part in parts:
+            if isinstance(part, tuple):
+                val = local_vars.get(part[1])
+                if val is None:
+                    return None
+                out.append(str(val))
+            else:
+                out.append(part)
+        return "".join(out)
+    return render_parts
+
+
+@dataclass(frozen=True)
+class _CompiledInterpreter:
+    interp: Interpreter
+    extract: tuple  # tuple[(ExtractSpec, render_from_label)]
+    emit: Any       # render(local_vars, interp_name)
+
+
+class EvaluationPlan:
+    """
+    All loaded interpreters compiled for fast evaluation.
+
+    Built once per interpreter set (see `compile_plan()`). Label keys
+    are classified against every regex-flavor interpreter in a single
+    pass: interpreters are indexed by the literal prefix of their
+    `any_label_key_matches` pattern, so a key is only `fullmatch`ed
+    against interpreters whose prefix it starts with. `extract` and
+    `emit` templates are pre-parsed, so evaluation never re-scans a
+    template string.
+
+    Output is identical to running each interpreter on its own, in
+    interpreter order, one observation per matching key in label order.
+    """
+
+    def __init__(self, interpreters):
+        self.interpreters = tuple(interpreters)
+        self._compiled = tuple(
+            _CompiledInterpreter(
+                interp=interp,
+                extract=tuple(
+                    (spec, _compile_label_template(spec.from_label_template))
+                    for spec in interp.extract
+                ),
+                emit=_compile_emit(interp.emit),
+            )
+            for interp in self.interpreters
+        )
+        by_prefix: dict = {}
+        for index, interp in enumerate(self.interpreters):
+            if interp.match_any_label_key is not None:
+                prefix = _literal_prefix(interp.match_any_label_key.pattern)
+                by_prefix.setdefault(prefix, []).append(index)
+        # Longest prefixes first is not required for correctness; sorting
+        # just keeps the scan order deterministic.
+        self._prefix_groups = tuple(
+            (prefix, tuple(indexes)) for prefix, indexes in sorted(by_prefix.items())
+        )
+
+    def __len__(self) -> int:
+        return len(self.interpreters)
+
+    def evaluate(self, labels: dict) -> list:
+        captures, failed = self._classify(labels)
+        results = []
+        for index, compiled in enumerate(self._compiled):
+            if index in failed:
+                continue
+            interp = compiled.interp
+            try:
+                if interp.match_any_label_key is not None:
+                    out = []
+                    for groups in captures.get(index, ()):
+                        obs = _run_extract_and_emit(compiled, labels, groups)
+                        if obs is not None:
+                            out.append(obs)
+                    results.extend(out)
+                    continue
+                # Fixed-key match flavor.
+                value = labels.get(interp.match_label_key)
+                if value is None:
+                    continue
+                if interp.match_label_value_equals is not None:
+                    if str(value).strip().lower() != interp.match_label_value_equals.strip().lower():
+                        continue
+                obs = _run_extract_and_emit(compiled, labels, {})
+                if obs is not None:
+                    results.append(obs)
+            except Exception as e:  # defensive — bad regex at runtime, etc.
+                logger.warning(
+                    f"[interpreter:{interp.name}] unexpected error during evaluation: {e}; skipping"
+                )
+        return results
+
+    def _classify(self, labels: dict):
+        """One pass over label keys -> {interp_index: [captures, ...]}."""
+        captures: dict = {}
+        failed: set = set()
+        if not self._prefix_groups:
+            return captures, failed
+        interpreters = self.interpreters
+        for key in labels:
+            for prefix, indexes in self._prefix_groups:
+                if not key.startswith(prefix):
+                    continue
+                for index in indexes:
+                    if index in failed:
+                        continue
+                    try:
+                        m = interpreters[index].match_any_label_key.fullmatch(key)
+                    except Exception as e:
+                        logger.warning(
+                            f"[interpreter:{interpreters[index].name}] unexpected error "
+                            f"during evaluation: {e}; skipping"
+                        )
+                        failed.add(index)
+                        continue
+                    if m is not None:
+                        captures.setdefault(index, []).append(dict(m.groupdict()))
+        return captures, failed
+
+
+def compile_plan(interpreters) -> EvaluationPlan:
+    """Compile a list of Interpreter objects into an EvaluationPlan."""
+    return EvaluationPlan(interpreters)
+
+
 # ---------------------------------------------------------------------------
 # Evaluation
 # ---------------------------------------------------------------------------
@@ -294,58 +691,27 @@ def evaluate(interpreters, labels: dict) -> list:
     """
     Run every interpreter against the container's labels.
 
+    `interpreters` is an EvaluationPlan (normally `LoadResult.plan`)
+    or a plain list of Interpreter objects, which is compiled on the
+    fly — pass the plan on hot paths.
+
     Returns the concatenated list of observations. An interpreter
     can produce zero or more observations: a regex-match flavor can
     fire multiple times (e.g. multiple Traefik routers on one
     container) and emits one observation per match; a fixed-key
     flavor emits at most one observation.
     """
-    results = []
-    for interp in interpreters:
-        try:
-            results.extend(_evaluate_one(interp, labels))
-        except Exception as e:  # defensive — bad regex at runtime, etc.
-            logger.warning(
-                f"[interpreter:{interp.name}] unexpected error during evaluation: {e}; skipping"
-            )
-    return results
+    plan = interpreters if isinstance(interpreters, EvaluationPlan) else compile_plan(interpreters)
+    return plan.evaluate(labels)
 
 
-def _evaluate_one(interp: Interpreter, labels: dict) -> list:
-    """Evaluate a single interpreter against labels; return list of observations."""
-    if interp.match_any_label_key is not None:
-        captures_list = []
-        for key in labels:
-            m = interp.match_any_label_key.fullmatch(key)
-            if m is None:
-                continue
-            captures_list.append(dict(m.groupdict()))
-        if not captures_list:
-            return []
-        out = []
-        for captures in captures_list:
-            obs = _run_extract_and_emit(interp, labels, captures)
-            if obs is not None:
-                out.append(obs)
-        return out
-
-    # Fixed-key match flavor.
-    value = labels.get(interp.match_label_key)
-    if value is None:
-        return []
-    if interp.match_label_value_equals is not None:
-        if str(value).strip().lower() != interp.match_label_value_equals.strip().lower():
-            return []
-    obs = _run_extract_and_emit(interp, labels, {})
-    return [obs] if obs is not None else []
-
-
-def _run_extract_and_emit(interp: Interpreter, labels: dict, captures: dict) -> Optional[dict]:
+def _run_extract_and_emit(compiled: _CompiledInterpreter, labels: dict, captures: dict) -> Optional[dict]:
     """Run the extract step (using captures) and then the emit step."""
+    interp = compiled.interp
     local_vars: dict = {}
-    for spec in interp.extract:
+    for spec, render_label in compiled.extract:
         try:
-            label_key = _substitute(spec.from_label_template, captures)
+            label_key = render_label(captures)
         except KeyError as e:
             logger.debug(
                 f"[interpreter:{interp.name}] extract.{spec.name}: capture {e} not available; "
@@ -355,7 +721,13 @@ def _run_extract_and_emit(interp: Interpreter, labels: dict, captures: dict) ->
             continue
         raw_value = labels.get(label_key)
         local_vars[spec.name] = _resolve_extract_value(interp.name, spec, raw_value)
-    return _build_emit(interp, local_vars)
+    result = compiled.emit(local_vars, interp.name)
+    if not isinstance(result, dict):
+        logger.warning(
+            f"[interpreter:{interp.name}] emit did not resolve to a mapping; skipping"
+        )
+        return None
+    return result
 
 
 def _resolve_extract_value(interp_name: str, spec: ExtractSpec, raw_value: Any) -> Any:
@@ -396,92 +768,71 @@ def _resolve_extract_value(interp_name: str, spec: ExtractSpec, raw_value: Any)
     return value
 
 
-def _build_emit(interp: Interpreter, local_vars: dict) -> Optional[dict]:
-    """Walk the emit dict recursively, substituting {name} from local_vars."""
-    result = _substitute_value(interp.emit, local_vars, interp.name)
-    if not isinstance(result, dict):
-        logger.warning(
-            f"[interpreter:{interp.name}] emit did not resolve to a mapping; skipping"
-        )
-        return None
-    return result
-
-
-def _substitute_value(value: Any, local_vars: dict, interp_name: str) -> Any:
-    """
-    Recursively walk a value from the emit section, substituting any
-    `{var}` placeholders in string leaves against local_vars.
+# ---------------------------------------------------------------------------
+# Observation cache
+# ---------------------------------------------------------------------------
 
-    Null propagation: if a string template contains a `{var}` whose
-    value is None, the whole string field resolves to None.
+class ObservationCache:
     """
-    if isinstance(value, dict):
-        return {k: _substitute_value(v, local_vars, interp_name) for k, v in value.items()}
-    if isinstance(value, list):
-        return [_substitute_value(v, local_vars, interp_name) for v in value]
-    if isinstance(value, str):
-        return _substitute_string_leaf(value, local_vars, interp_name)
-    return value
+    Bounded LRU of evaluate() results keyed by label-set fingerprint.
 
+    Container labels almost never change between refreshes, so the
+    same labels dict is evaluated over and over. The key is a digest of
+    the sorted label items plus the LoadResult version, and the whole
+    cache is dropped the first time a different version is seen, so a
+    reload never serves observations from the previous interpreter set.
 
-def _substitute_string_leaf(template: str, local_vars: dict, interp_name: str) -> Any:
+    Returned lists are fresh copies; the observation dicts inside are
+    shared between calls and must be treated as read-only.
     """
-    Substitute {name} placeholders in a string.
-
-    Special cases:
-      - If the template is exactly `{name}` and `local_vars[name]` is
-        not a string, return that value verbatim (preserves bools,
-        ints, lists).
-      - If any referenced var is None, the whole resolved value is None.
-      - If a referenced var is missing from local_vars, log a debug
-        message and treat as None (null propagation).
-    """
-    refs = list(_FIELD_NAME_RE.finditer(template))
-    if not refs:
-        return template
 
-    # Bare-placeholder shortcut: '{x}' returns x verbatim (preserves type / null).
-    if len(refs) == 1 and refs[0].group(0) == template:
-        name = refs[0].group(1)
-        if name not in local_vars:
-            logger.debug(
-                f"[interpreter:{interp_name}] emit template references unknown var {{{name}}}"
-            )
-            return None
-        return local_vars[name]
-
-    # Multi-placeholder / partial string. Substitute textually.
-    # If any referenced var is None, the whole field becomes None.
-    out_parts = []
-    last = 0
-    for m in refs:
-        out_parts.append(template[last:m.start()])
-        name = m.group(1)
-        val = local_vars.get(name)
-        if val is None:
-            return None
-        out_parts.append(str(val))
-        last = m.end()
-    out_parts.append(template[last:])
-    return "".join(out_parts)
-
-
-_FIELD_NAME_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
-
-
-def _substitute(template: str, mapping: dict) -> str:
-    """
-    Substitute {name} placeholders in a label-key template (extract.from_label).
-
-    Raises KeyError if a referenced name is missing — the caller falls
-    back to the extract spec's default.
-    """
-    def repl(m):
-        name = m.group(1)
-        if name not in mapping:
-            raise KeyError(name)
-        val = mapping[name]
-        if val is None:
-            raise KeyError(name)
-        return str(val)
-    return _FIELD_NAME_RE.sub(repl, template)
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self._version = None
+
+    def evaluate(self, load_result: LoadResult, labels: dict, fingerprint: bytes = None) -> list:
+        """
+        Return evaluate(load_result.plan, labels), from cache when possible.
+        `fingerprint` is `labels_fingerprint(labels)` when the caller already has it.
+        """
+        if self.maxsize <= 0:
+            return evaluate(load_result.plan, labels)
+        key = fingerprint or labels_fingerprint(labels)
+        with self._lock:
+            if self._version != load_result.version:
+                self._entries.clear()
+                self._version = load_result.version
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(cached)
+            self.misses += 1
+
+        observations = evaluate(load_result.plan, labels)
+        with self._lock:
+            if self._version == load_result.version:
+                self._entries[key] = observations
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return list(observations)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def labels_fingerprint(labels: dict) -> bytes:
+    """Order-independent digest of a label set (the ObservationCache key)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key, value in sorted(labels.items()):
+        digest.update(str(key).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(str(value).encode("utf-8"))
+        digest.update(b"\1")
+    return digest.digest()
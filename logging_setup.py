@@ -10,42 +10,149 @@ Usage from any module:
 The first call configures handlers on the root logger. Subsequent
 calls are no-ops with respect to handler setup.
 
+By default records are handed to a queue and written to the log file
+and console by a background listener thread, so a log line costs the
+calling thread an enqueue rather than disk I/O and rotation checks.
+
+Per-message-type rate limiting: a record logged with
+`extra={"rate_key": "<type>"}` is let through at most
+NOTIFIER_LOG_RATE_LIMIT times per minute per type; the first one after
+a suppressed stretch says how many were dropped. Used for the
+per-container lines of the refresh path.
+
+    logger.info(f"[MATCH] ...", extra={"rate_key": "match.refresh"})
+
+Expensive debug payloads are built only when DEBUG is on:
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(payload, indent=2))
+
 Environment variables:
-    NOTIFIER_LOG_TO_STDOUT  "0" disables console output. Default "1".
+    NOTIFIER_LOG_TO_STDOUT   "0" disables console output. Default "1".
+    NOTIFIER_LOG_LEVEL       Root log level. Default INFO.
+    NOTIFIER_LOG_FORMAT      "text" (default) or "json" (one JSON
+                             object per line).
+    NOTIFIER_LOG_ASYNC       "0" writes logs synchronously from the
+                             calling thread. Default "1".
+    NOTIFIER_LOG_RATE_LIMIT  Records per rate_key per minute. Default
+                             20; 0 disables rate limiting.
 """
 
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 LOG_FILE = "/config/notifier.log"
 LOG_FORMAT = "[%(asctime)s] [%(levelname)s] %(message)s"
 LOG_MAX_BYTES = 10 * 1024 * 1024
 LOG_BACKUP_COUNT = 4
+RATE_LIMIT_WINDOW_SECONDS = 60.0
 
 _configured = False
+_rate_filter = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message (+ exc_info)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most `limit` records per `rate_key` through per `window` seconds."""
+
+    def __init__(self, limit: int, window: float = RATE_LIMIT_WINDOW_SECONDS):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        # rate_key -> [window start, records passed, records suppressed]
+        self._windows: dict = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "rate_key", None)
+        if key is None or self.limit <= 0:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            suppressed = 0
+            if state is None or now - state[0] >= self.window:
+                if state is not None:
+                    suppressed = state[2]
+                state = self._windows[key] = [now, 0, 0]
+            if state[1] >= self.limit:
+                state[2] += 1
+                return False
+            state[1] += 1
+        if suppressed:
+            record.msg = (
+                f"{record.getMessage()} ({suppressed} similar message(s) suppressed "
+                f"in the last {self.window:g}s)"
+            )
+            record.args = None
+        return True
 
 
 def _configure_once():
-    global _configured
+    global _configured, _rate_filter
     if _configured:
         return
-    formatter = logging.Formatter(LOG_FORMAT)
+    if os.environ.get("NOTIFIER_LOG_FORMAT", "text").strip().lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
     file_handler = RotatingFileHandler(
         LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
     )
     file_handler.setFormatter(formatter)
-    root = logging.getLogger()
-    root.setLevel(logging.INFO)
-    root.addHandler(file_handler)
+    handlers.append(file_handler)
     if os.environ.get("NOTIFIER_LOG_TO_STDOUT", "1") == "1":
         console = logging.StreamHandler()
         console.setFormatter(formatter)
-        root.addHandler(console)
+        handlers.append(console)
+
+    root = logging.getLogger()
+    level = logging.getLevelName(os.environ.get("NOTIFIER_LOG_LEVEL", "INFO").strip().upper())
+    root.setLevel(level if isinstance(level, int) else logging.INFO)
+    if os.environ.get("NOTIFIER_LOG_ASYNC", "1") == "1":
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        root.addHandler(QueueHandler(log_queue))
+    else:
+        for handler in handlers:
+            root.addHandler(handler)
+
+    try:
+        limit = int(os.environ.get("NOTIFIER_LOG_RATE_LIMIT", "20"))
+    except ValueError:
+        limit = 20
+    _rate_filter = RateLimitFilter(limit)
     _configured = True
 
 
 def get_logger(name: str) -> logging.Logger:
     """Return a configured logger for the given module name."""
     _configure_once()
-    return logging.getLogger(name)
+    logger = logging.getLogger(name)
+    if _rate_filter not in logger.filters:
+        logger.addFilter(_rate_filter)
+    return logger
@@ -1,17 +1,58 @@
 import os
-import docker
 from datetime import datetime
 from notifiers import technitium_dns, service_tracker_dashboard
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from logging_setup import get_logger
 import interpreter_loader
+import notifier_registry
+import http_transport
+import metrics
+import outbox
+import profiling
+from delivery import KeyedWorkerPool
+from container_snapshot import ContainerSnapshot, parse_notifiers
+from container_state import ContainerStateStore
+from event_coalescer import EventCoalescer, FlapDamper
+from event_stream import EventCursor, EventStream
+from refresh_scheduler import RefreshScheduler, make_policy
+from state_store import JsonStateStore
+import docker_hosts
 
 logger = get_logger("main")
 
 # === Settings ===
 logger.debug("main.py is running")
 STD_REFRESH_SECONDS = int(os.environ.get("STD_REFRESH_SECONDS", "60"))  # Default to 60 seconds
+# Each container is refreshed in its own slot within the interval,
+# offset by up to REFRESH_JITTER × interval, instead of all at once.
+# REFRESH_SPREAD=false refreshes everything together at each interval.
+REFRESH_JITTER = float(os.environ.get("REFRESH_JITTER", "0.1"))
+# Refresh policy: `adaptive` doubles a container's refresh interval after
+# each quiet refresh, up to REFRESH_MAX_SECONDS, and resets it to
+# STD_REFRESH_SECONDS on any lifecycle event. `fixed` refreshes every
+# container every STD_REFRESH_SECONDS.
+REFRESH_POLICY = os.environ.get("REFRESH_POLICY", "adaptive")
+REFRESH_MAX_SECONDS = float(os.environ.get("REFRESH_MAX_SECONDS", "900"))
+REFRESH_BACKOFF_FACTOR = float(os.environ.get("REFRESH_BACKOFF_FACTOR", "2"))
+# Minimum sleep between refresh wake-ups; slots closer than this are batched.
+REFRESH_BATCH_WINDOW_SECONDS = 1.0
+# Delivery pool: Docker events are parsed on the main thread and handed
+# to this many workers. Events for one container always land on the
+# same worker, so per-container ordering is preserved.
+DELIVERY_WORKERS = max(1, int(os.environ.get("DELIVERY_WORKERS", "4")))
+DELIVERY_QUEUE_SIZE = int(os.environ.get("DELIVERY_QUEUE_SIZE", "1000"))  # per worker
+# Refresh reads container state from memory; this is how often the
+# store is reconciled against the daemon (one sparse list call). 0 = never.
+CONTAINER_RESYNC_SECONDS = int(os.environ.get("CONTAINER_RESYNC_SECONDS", "3600"))
+# Boot scan: how many containers are processed concurrently at startup.
+BOOT_CONCURRENCY = max(1, int(os.environ.get("BOOT_CONCURRENCY", "8")))
+# Event coalescing: a container's events are held until it has been
+# quiet for this long (or the max delay passes), then dispatched once
+# with its final state. 0 disables coalescing.
+EVENT_COALESCE_SECONDS = float(os.environ.get("EVENT_COALESCE_SECONDS", "2"))
+EVENT_COALESCE_MAX_DELAY_SECONDS = float(os.environ.get("EVENT_COALESCE_MAX_DELAY_SECONDS", "10"))
 
 
 def _parse_bool_env(name, default=False):
@@ -29,57 +70,146 @@ def _parse_bool_env(name, default=False):
     return False
 
 
+REFRESH_SPREAD = _parse_bool_env("REFRESH_SPREAD", default=True)
+
+
 # When True, the STD notifier fires for every running container on this
 # host regardless of whether the container has the
 # `dockernotifier.notifiers=service-tracker-dashboard` opt-in label.
 # Scope is intentionally limited to STD — other notifiers (DNS) still
 # require explicit per-container opt-in.
 STD_REPORT_ALL_CONTAINERS = _parse_bool_env("STD_REPORT_ALL_CONTAINERS")
+notifier_registry.get(service_tracker_dashboard.NAME).report_all = STD_REPORT_ALL_CONTAINERS
 if STD_REPORT_ALL_CONTAINERS:
     logger.info(
         "STD_REPORT_ALL_CONTAINERS is on — every running container on this host "
         "will be reported to STD regardless of opt-in label"
     )
 
-# Debug-only: re-load interpreters on every event instead of once at
-# startup. Not for production use; intended for iterating on YAML
-# files without bouncing the notifier.
+# Debug-only: check the interpreter directories for changed YAML on
+# every event instead of on the INTERPRETER_WATCH_SECONDS schedule.
+# Intended for iterating on YAML files without bouncing the notifier.
 INTERPRETER_RELOAD_ON_EACH_EVENT = _parse_bool_env("INTERPRETER_RELOAD_ON_EACH_EVENT")
 
-# Loaded once at startup. See `interpreter_loader.py`.
-INTERPRETER_LOAD_RESULT = interpreter_loader.load_interpreters()
-
-# Real Docker events the notifier subscribes to.
-WATCHED_DOCKER_ACTIONS = frozenset({
-    "start", "stop", "die", "pause", "unpause",
-    "destroy", "kill", "update",
-})
-
-# Synthetic actions the notifier injects (not from Docker).
-SYNTHETIC_ACTIONS = frozenset({"boot", "refresh"})
-
-# Per-notifier action sets. Each notifier declares the actions it wants
-# to be invoked for, drawn from WATCHED_DOCKER_ACTIONS and SYNTHETIC_ACTIONS.
-NOTIFIER_TRIGGERS = {
-    "dns": {"boot", "start"},
-    "service-tracker-dashboard": WATCHED_DOCKER_ACTIONS | SYNTHETIC_ACTIONS,
-}
+# Loaded at startup. `INTERPRETERS.current` is the active, immutable
+# interpreter set; reloads swap in a new one. See `interpreter_loader.py`.
+INTERPRETERS = interpreter_loader.InterpreterRegistry()
+
+# Hot reload: poll the interpreter directories every N seconds and swap
+# in changed files. 0 = load once at startup.
+INTERPRETER_WATCH_SECONDS = float(os.environ.get("INTERPRETER_WATCH_SECONDS", "0"))
+
+# LRU of interpreter results keyed by label-set fingerprint; entries are
+# dropped automatically when interpreters are reloaded. 0 disables.
+INTERPRETER_CACHE_SIZE = int(os.environ.get("INTERPRETER_CACHE_SIZE", "1024"))
+OBSERVATION_CACHE = interpreter_loader.ObservationCache(INTERPRETER_CACHE_SIZE)
+
+# Docker and synthetic actions; each notifier declares which of them it
+# fires on when it registers (see `notifier_registry.py`).
+WATCHED_DOCKER_ACTIONS = notifier_registry.WATCHED_DOCKER_ACTIONS
+SYNTHETIC_ACTIONS = notifier_registry.SYNTHETIC_ACTIONS
+
+
+# Flap damping for crash-looping containers; see `event_coalescer.py`.
+FLAP_DAMPING = _parse_bool_env("FLAP_DAMPING", default=True)
+FLAP_HALF_LIFE_SECONDS = float(os.environ.get("FLAP_HALF_LIFE_SECONDS", "60"))
+FLAP_SUPPRESS_THRESHOLD = float(os.environ.get("FLAP_SUPPRESS_THRESHOLD", "4"))
+FLAP_REUSE_THRESHOLD = float(os.environ.get("FLAP_REUSE_THRESHOLD", "1"))
+
+# docker_status reported to notifiers while a container is flap-suppressed.
+FLAPPING_STATUS = "flapping"
+
+# Event stream resume: the last event read is persisted here, and after
+# a reconnect or restart the stream resubscribes with `since=` to replay
+# what was missed. Outages longer than the max gap (the daemon only
+# buffers recent events) fall back to a full rescan.
+EVENT_CURSOR_FILE = os.environ.get("EVENT_CURSOR_FILE", "/config/event_cursor.json").strip()
+EVENT_RESUME_MAX_GAP_SECONDS = float(os.environ.get("EVENT_RESUME_MAX_GAP_SECONDS", "600"))
+
+# Prometheus /metrics endpoint; see `metrics.py`. 0 disables it.
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))
+METRICS_BIND = os.environ.get("METRICS_BIND", "0.0.0.0")
+
+# Opt-in per-stage timing and cProfile capture; see `profiling.py`.
+# A capture window can also be opened at any time with SIGUSR1.
+PROFILE_STAGES = _parse_bool_env("PROFILE_STAGES")
+PROFILE_STAGES_FILE = os.environ.get("PROFILE_STAGES_FILE", profiling.DEFAULT_STAGES_FILE)
+PROFILE_STAGES_INTERVAL = float(os.environ.get("PROFILE_STAGES_INTERVAL", "60"))
+PROFILE_CAPTURE_SECONDS = float(os.environ.get("PROFILE_CAPTURE_SECONDS", "30"))
+PROFILE_CAPTURE_AT_START = _parse_bool_env("PROFILE_CAPTURE_AT_START")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", profiling.DEFAULT_PROFILE_DIR)
+
+
+def _refresh_containers(store, docker_host, container_ids, damper=None):
+    """Run the `refresh` action for the given containers that are still running."""
+    batches = notifier_registry.start_batches()
+    for container_id in container_ids:
+        container = store.get_running(container_id)
+        if container is None:
+            continue
+        try:
+            flapping = damper is not None and damper.is_suppressed(container.id)
+            handle_container_event(
+                container, docker_host, action="refresh",
+                batches=batches, flapping=flapping,
+            )
+        except Exception as e:
+            logger.error(f"Refresh failed for {container.name}: {e}")
+    notifier_registry.flush_batches(batches, f"refresh on {docker_host}")
 
 
-def is_trigger_enabled(notifier, action):
-    return action in NOTIFIER_TRIGGERS.get(notifier, {"start"})
+def make_refresh_scheduler():
+    policy = make_policy(REFRESH_POLICY, STD_REFRESH_SECONDS, REFRESH_MAX_SECONDS, REFRESH_BACKOFF_FACTOR)
+    return RefreshScheduler(policy, jitter=REFRESH_JITTER, spread=REFRESH_SPREAD)
 
 
-def periodic_update_loop(docker_host):
-    client = docker.from_env()
+def periodic_update_loop(store, docker_host, damper=None, stream=None, scheduler=None):
+    """
+    Refresh each running container in its own jittered slot, at the
+    cadence its refresh policy gives it (see `refresh_scheduler.py`).
+    Once per STD_REFRESH_SECONDS the store is synced into the schedule
+    and the caches, cursor and metrics are flushed.
+    """
+    scheduler = scheduler or make_refresh_scheduler()
+    last_resync = time.monotonic()
+    next_cycle = time.monotonic()
+    busy = None
+    logger.debug(
+        f"STD refresh loop for {docker_host} — {scheduler.policy.name} policy, "
+        f"every {STD_REFRESH_SECONDS} sec"
+    )
     while True:
-        logger.debug(f"STD refresh loop — every {STD_REFRESH_SECONDS} sec")
-        for container in client.containers.list():
-            try:
-                handle_container_event(container, docker_host, action="refresh")
-            except Exception as e:
-                logger.error(f"Refresh failed for {container.name}: {e}")
-        time.sleep(STD_REFRESH_SECONDS)
+        now = time.monotonic()
+        if now >= next_cycle:
+            if busy is not None:
+                service_tracker_dashboard.flush_change_cache()
+                technitium_dns.flush_state()
+                if stream is not None:
+                    stream.heartbeat()
+                # Time spent refreshing during the interval that just ended.
+                metrics.REFRESH_SWEEP_SECONDS.observe(busy)
+                http_transport.log_connection_stats()
+                logger.debug(f"Interpreter cache: {OBSERVATION_CACHE.stats()}")
+            busy = 0.0
+            if CONTAINER_RESYNC_SECONDS > 0 and now - last_resync >= CONTAINER_RESYNC_SECONDS:
+                _resync(store, docker_host)
+                last_resync = time.monotonic()
+            scheduler.sync(c.id for c in store.running())
+            next_cycle += scheduler.interval
+            if next_cycle <= now:
+                next_cycle = now + scheduler.interval
+
+        due = scheduler.pop_due()
+        if due:
+            started = time.perf_counter()
+            with profiling.capture():
+                _refresh_containers(store, docker_host, due, damper)
+            busy += time.perf_counter() - started
+
+        # Wake for the next slot, but at most once per batch window so
+        # containers with nearby slots share a wake-up (and a bulk post).
+        wake = min(next_cycle, scheduler.next_due() or next_cycle)
+        time.sleep(max(wake - time.monotonic(), REFRESH_BATCH_WINDOW_SECONDS))
 
 
 def get_host_name():
@@ -90,126 +220,70 @@ def get_host_name():
         return os.uname()[1]
 
 
-def _extract_networks(container_attrs):
-    network_settings = container_attrs.get("NetworkSettings") or {}
-    networks_raw = network_settings.get("Networks") or {}
-    return [
-        {"name": name, "aliases": (data.get("Aliases") or []) if isinstance(data, dict) else []}
-        for name, data in networks_raw.items()
-    ]
+def handle_container_event(container, docker_host, action, batches=None, flapping=False):
+    """
+    Dispatch one container to every notifier that should fire for `action`.
 
+    `container` is a `ContainerSnapshot` (a docker-py Container is
+    converted on the way in); its labels, ports and networks were parsed
+    when it was inspected, so nothing is re-parsed here.
 
-def _extract_exposed_ports(container_attrs):
-    config = container_attrs.get("Config") or {}
-    exposed = config.get("ExposedPorts") or {}
-    return list(exposed.keys())
+    Which notifiers fire comes from the notifier registry: the container
+    must opt in (or the notifier reports all containers) and the action
+    must be one of the notifier's declared triggers. The calls run
+    concurrently and failures are isolated per notifier; see
+    `notifier_registry.fan_out()`.
 
+    When `batches` (from `notifier_registry.start_batches()`) has a list
+    for a notifier, that notifier's kwargs are appended to it instead of
+    being sent, so the caller can deliver a whole sweep at once.
 
-def _extract_published_ports(container_attrs):
-    network_settings = container_attrs.get("NetworkSettings") or {}
-    ports_raw = network_settings.get("Ports") or {}
-    out = []
-    for port_key, bindings in ports_raw.items():
-        if not bindings:
-            continue
-        try:
-            container_port_str, protocol = port_key.split("/", 1)
-            container_port = int(container_port_str)
-        except (ValueError, AttributeError):
-            logger.debug(f"Skipping malformed port key {port_key!r}")
-            continue
-        for binding in bindings:
-            if not isinstance(binding, dict):
-                continue
-            host_port_raw = binding.get("HostPort")
-            try:
-                host_port = int(host_port_raw)
-            except (TypeError, ValueError):
-                logger.debug(
-                    f"Skipping binding with non-integer HostPort={host_port_raw!r} for {port_key}"
-                )
-                continue
-            out.append({
-                "container_port": container_port,
-                "protocol": protocol,
-                "host_ip": binding.get("HostIp", "") or "",
-                "host_port": host_port,
-            })
-    return out
-
-
-def handle_container_event(container, docker_host, action):
-    labels = container.attrs["Config"]["Labels"] or {}
-    notifier_list_raw = labels.get("dockernotifier.notifiers", "").strip()
-    notifier_list = [n.strip() for n in notifier_list_raw.split(",") if n.strip()]
-
-    std_via_label = "service-tracker-dashboard" in notifier_list
-    std_via_env = STD_REPORT_ALL_CONTAINERS
-    std_should_fire = (
-        (std_via_label or std_via_env)
-        and action in NOTIFIER_TRIGGERS["service-tracker-dashboard"]
-    )
-    dns_should_fire = (
-        "dns" in notifier_list and action in NOTIFIER_TRIGGERS["dns"]
-    )
+    When `flapping` is True the container is flap-suppressed: STD is
+    sent `docker_status="flapping"` instead of the momentary state, and
+    DNS is not touched.
+    """
+    if not isinstance(container, ContainerSnapshot):
+        with profiling.stage("snapshot"):
+            container = ContainerSnapshot.from_container(container)
 
-    if not std_should_fire and not dns_should_fire:
+    targets = notifier_registry.interested(container.notifiers, action, flapping)
+    if not targets:
         return
 
-    base_kwargs = {
-        "container_name": container.name,
-        "container_id": container.id,
-        "docker_host": docker_host,
-        "docker_status": container.attrs["State"]["Status"],
-        "image_name": container.attrs["Config"]["Image"],
-        "stack_name": labels.get("com.docker.compose.project"),
-        "started_at": container.attrs["State"]["StartedAt"],
-        "action": action,
-        "networks": _extract_networks(container.attrs),
-        "exposed_ports": _extract_exposed_ports(container.attrs),
-        "published_ports": _extract_published_ports(container.attrs),
-    }
-
-    logger.info(f"[MATCH] Container {action.upper()}: {container.name}")
-
-    if dns_should_fire:
-        container_hostname = labels.get("dockernotifier.dns.containerhostname")
-        zone_label = labels.get("dockernotifier.dns.containerzone")
-        docker_domain = labels.get("dockernotifier.dns.dockerdomain")
-        container_fqdn = (
-            f"{container_hostname}.{zone_label}"
-            if container_hostname and zone_label
-            else None
+    with profiling.stage("extract"):
+        base_kwargs = container.base_kwargs(
+            docker_host, action, status=FLAPPING_STATUS if flapping else None,
         )
 
-        if container_fqdn and docker_domain and zone_label:
-            logger.info(f"DNS notifier triggered for {container.name} on {action}")
-            technitium_dns.register(
-                **base_kwargs,
-                container_fqdn=container_fqdn,
-                zone=zone_label,
-                value=f"{docker_host}.{docker_domain}",
-            )
-        else:
-            logger.warning(f"Missing DNS label info for {container.name}, skipping DNS registration")
+    logger.info(
+        f"[MATCH] Container {action.upper()}: {container.name}",
+        extra={"rate_key": "match.refresh"} if action == "refresh" else None,
+    )
 
-    if std_should_fire:
-        if std_via_env and not std_via_label:
-            logger.debug(
-                f"STD notifier firing for {container.name} via "
-                f"STD_REPORT_ALL_CONTAINERS (no opt-in label)"
-            )
-        logger.info(f"STD notifier triggered for {container.name} on {action}")
-        std_extras = {
-            key.replace("dockernotifier.std.", ""): value
-            for key, value in labels.items()
-            if key.startswith("dockernotifier.std.")
-        }
-        std_extras["exposure_observations"] = _run_interpreters(labels)
-        service_tracker_dashboard.register(**base_kwargs, **std_extras)
+    # Interpreters run at most once per event, and only if a notifier asks.
+    observations = []
+
+    def observe():
+        if not observations:
+            with profiling.stage("interpreters"):
+                observations.append(_run_interpreters(container.labels, container.labels_fingerprint))
+        return observations[0]
+
+    calls = []
+    for notifier in targets:
+        if notifier.name not in container.notifiers:
+            logger.debug(f"{notifier.name} notifier firing for {container.name} without an opt-in label")
+        kwargs = notifier.kwargs_for(container, base_kwargs, observe)
+        if kwargs is None:
+            continue
+        if batches is not None and notifier.name in batches:
+            batches[notifier.name].append(kwargs)
+        else:
+            calls.append((notifier.name, notifier.send, kwargs))
+    notifier_registry.fan_out(calls, container.name)
 
 
-def _run_interpreters(labels):
+def _run_interpreters(labels, fingerprint=None):
     """
     Run all loaded interpreters against a container's labels.
 
@@ -219,43 +293,277 @@ def _run_interpreters(labels):
       - None if no interpreters are loaded — STD treats null as
         "no update; preserve existing exposure rows."
     """
-    global INTERPRETER_LOAD_RESULT
     if INTERPRETER_RELOAD_ON_EACH_EVENT:
-        INTERPRETER_LOAD_RESULT = interpreter_loader.load_interpreters()
-    if not INTERPRETER_LOAD_RESULT.any_loaded:
+        INTERPRETERS.reload_if_changed()
+    load_result = INTERPRETERS.current
+    if not load_result.any_loaded:
         return None
-    return interpreter_loader.evaluate(INTERPRETER_LOAD_RESULT.interpreters, labels)
+    return OBSERVATION_CACHE.evaluate(load_result, labels, fingerprint)
 
-def main():
-    client = docker.from_env()
-    docker_host = get_host_name()
-    logger.info(f"Starting Docker API Notifier on host: {docker_host}")
 
-    logger.info("Running boot-time scan of existing containers...")
-    for container in client.containers.list():
+def interpreter_watch_loop():
+    logger.info(f"Watching interpreter directories for changes every {INTERPRETER_WATCH_SECONDS:g} sec")
+    while True:
+        time.sleep(INTERPRETER_WATCH_SECONDS)
         try:
-            handle_container_event(container, docker_host, action="boot")
+            INTERPRETERS.reload_if_changed()
         except Exception as e:
-            logger.error(f"Failed to process container {container.name} on boot: {e}")
+            logger.error(f"Interpreter reload check failed: {e}")
 
-    threading.Thread(target=periodic_update_loop, args=(docker_host,), daemon=True).start()
 
-    for event in client.events(decode=True):
-        if event.get("Type") != "container":
-            continue
-        action = event.get("Action")
-        if action not in WATCHED_DOCKER_ACTIONS:
-            continue
-        container_id = event.get("Actor", {}).get("ID") or event.get("id")
-        if not container_id:
-            continue
+def _process_event(store, docker_host, container_id, action, flapping=False, event_time=None,
+                   scheduler=None):
+    """
+    Delivery-worker job: re-inspect the container into the store and run
+    its notifiers. `event_time` (epoch seconds) is the Docker event's
+    time; the lag from it to completion is recorded in the metrics.
+    The event also resets the container's refresh cadence in `scheduler`.
+    """
+    try:
+        with profiling.capture():
+            container = store.apply_event(container_id, action)
+            if container is not None:
+                handle_container_event(container, docker_host, action=action, flapping=flapping)
+        if action == "destroy":
+            notifier_registry.forget(docker_host, container_id)
+        if scheduler is not None:
+            scheduler.note_event(container_id)
+    except Exception as e:
+        logger.error(f"Failed to handle {action} event for {container_id}: {e}")
+    if event_time is not None:
+        metrics.DELIVERY_LAG_SECONDS.observe(max(time.time() - event_time, 0.0), action=action)
+
+
+def _boot_scan(store, docker_host):
+    """
+    List the running containers, then inspect each into the container
+    store and run its `boot` action on a bounded thread pool. Logs
+    progress and total duration.
+
+    Called after the event subscription is live, so events that happen
+    during a slow boot are handled as they arrive. A container that a
+    live event has already re-inspected is skipped here — the event's
+    dispatch carried newer state than the boot listing.
+    """
+    started = time.monotonic()
+    container_ids = store.list_running()
+    total = len(container_ids)
+    logger.info(f"Boot scan of {docker_host}: {total} container(s), concurrency {BOOT_CONCURRENCY}")
+    batches = notifier_registry.start_batches()
+    progress_every = max(1, total // 10)
+    done = 0
+    done_lock = threading.Lock()
+
+    def boot_one(container_id):
+        nonlocal done
+        try:
+            with profiling.capture():
+                container = store.load_one(container_id)
+                if container is not None and not store.touched_by_event(container_id):
+                    handle_container_event(container, docker_host, action="boot", batches=batches)
+        except Exception as e:
+            logger.error(f"Failed to process container {container_id[:12]} on boot: {e}")
+        with done_lock:
+            done += 1
+            if done % progress_every == 0 or done == total:
+                logger.info(f"Boot scan progress on {docker_host}: {done}/{total}")
+
+    with ThreadPoolExecutor(max_workers=BOOT_CONCURRENCY, thread_name_prefix="boot") as executor:
+        list(executor.map(boot_one, container_ids))
+    notifier_registry.flush_batches(batches, f"boot scan of {docker_host}")
+    store.end_boot()
+    logger.info(f"Boot scan of {docker_host} finished: {total} container(s) in {time.monotonic() - started:.1f}s")
+
+
+def could_notify(labels):
+    """
+    Whether any notifier could ever fire for a container with these
+    labels. Labels are fixed for a container's lifetime, so a container
+    that fails this is never inspected, stored or refreshed.
+    """
+    return notifier_registry.could_notify(parse_notifiers(labels))
+
+
+# Server-side filter for the Docker events API; `_ingest_event` still
+# checks type and action in case the daemon ignores a filter.
+EVENT_FILTERS = {"type": ["container"], "event": sorted(WATCHED_DOCKER_ACTIONS)}
+
+
+def _ingest_event(event, coalescer):
+    """
+    Ingestion only: filter and hand to the coalescer, which enqueues
+    onto the pool. Inspect + notifier delivery happen on the pool so a
+    slow downstream never stalls the event stream.
+
+    Docker puts the container's labels in `Actor.Attributes`, so a
+    container no notifier has opted in to is dropped here, before any
+    inspect. Events without attributes are passed through.
+    """
+    action = event.get("Action")
+    metrics.EVENTS_RECEIVED.inc(action=action)
+    actor = event.get("Actor") or {}
+    container_id = actor.get("ID") or event.get("id")
+    if event.get("Type") != "container" or action not in WATCHED_DOCKER_ACTIONS or not container_id:
+        metrics.EVENTS_FILTERED.inc(action=action)
+        return
+    attributes = actor.get("Attributes")
+    if attributes and not could_notify(attributes):
+        metrics.EVENTS_FILTERED.inc(action=action)
+        return
+    coalescer.offer(container_id, action, _event_time(event))
+
+
+def _event_time(event):
+    """Event wall-clock time in epoch seconds, from `timeNano` or `time`."""
+    if event.get("timeNano"):
+        return event["timeNano"] / 1e9
+    return event.get("time")
+
+
+def _resync(store, docker_host):
+    """
+    Reconcile the store with the daemon and drop notifier state kept for
+    containers that no longer exist (destroyed while we were not watching).
+    """
+    live_ids = store.resync()
+    if live_ids is not None:
+        notifier_registry.prune(docker_host, live_ids)
+
+
+def _on_reconnect(store, docker_host, resumed):
+    """
+    After the event stream reconnects: when missed events were replayed,
+    only reconcile the store; otherwise rescan and re-notify everything.
+    """
+    _resync(store, docker_host)
+    if not resumed:
+        logger.info("Event replay not possible; running a full rescan")
+        _boot_scan(store, docker_host)
+
+
+def _watch_host(host, pool, cursor_store, damper_factory):
+    """
+    Start everything one Docker host needs — coalescer, resumable event
+    stream, boot scan and refresh loop — on top of the shared delivery
+    pool. Returns (event thread, coalescer) once the boot scan is done.
+    """
+    client, docker_host = host.client, host.name
+    store = ContainerStateStore(client, wants=could_notify)
+    damper = damper_factory()
+    scheduler = make_refresh_scheduler()
+
+    def dispatch(container_id, action, flapping, event_time=None):
+        metrics.EVENTS_DISPATCHED.inc(action=action)
+        pool.submit(
+            f"{docker_host}/{container_id}", _process_event, store, docker_host,
+            container_id, action, flapping, event_time, scheduler,
+        )
+
+    coalescer = EventCoalescer(
+        dispatch,
+        window=EVENT_COALESCE_SECONDS,
+        max_delay=EVENT_COALESCE_MAX_DELAY_SECONDS,
+        damper=damper,
+    )
+    coalescer.start()
+
+    cursor = EventCursor(cursor_store, docker_host)
+    since = cursor.resume_point(EVENT_RESUME_MAX_GAP_SECONDS)
+    stream = EventStream(
+        client,
+        lambda event: _ingest_event(event, coalescer),
+        cursor,
+        on_reconnect=lambda resumed: _on_reconnect(store, docker_host, resumed),
+        max_gap=EVENT_RESUME_MAX_GAP_SECONDS,
+        name=docker_host,
+        filters=EVENT_FILTERS,
+    )
+
+    # Subscribe before the boot scan so nothing that happens during a
+    # slow boot is missed or delayed until the scan finishes.
+    ingest = threading.Thread(target=stream.run, args=(since,), name=f"events-{docker_host}", daemon=True)
+    ingest.start()
+    stream.connected.wait()
+
+    if since is not None:
+        # Recent restart: the replayed events cover what changed while we
+        # were down, so fill the store without re-notifying every container.
+        store.load(max_workers=BOOT_CONCURRENCY)
+        store.end_boot()
+        logger.info(f"Resumed the Docker event stream for {docker_host}; skipping boot-time notifications")
+    else:
+        logger.info(f"Running boot-time scan of existing containers on {docker_host}...")
+        _boot_scan(store, docker_host)
+
+    threading.Thread(
+        target=periodic_update_loop, args=(store, docker_host, damper, stream, scheduler),
+        name=f"refresh-{docker_host}", daemon=True,
+    ).start()
+    return ingest, coalescer
+
+
+def main():
+    hosts = docker_hosts.configured_hosts(get_host_name())
+    logger.info(
+        f"Starting Docker API Notifier on host(s): {', '.join(h.name for h in hosts)}"
+    )
+
+    # Shared by every host: delivery workers, retry scheduler, outbox and
+    # the notifiers' HTTP connection pools.
+    pool = KeyedWorkerPool(workers=DELIVERY_WORKERS, queue_size=DELIVERY_QUEUE_SIZE)
+    pool.start()
+
+    def make_damper():
+        if not FLAP_DAMPING:
+            return None
+        return FlapDamper(
+            half_life=FLAP_HALF_LIFE_SECONDS,
+            suppress_at=FLAP_SUPPRESS_THRESHOLD,
+            reuse_at=FLAP_REUSE_THRESHOLD,
+        )
+
+    coalescers = []
+    metrics.QUEUE_DEPTH.set_function(lambda: pool.depth() + sum(c.pending() for c in coalescers))
+    if METRICS_PORT > 0:
+        metrics.start_server(METRICS_PORT, METRICS_BIND)
+
+    # Notifications that failed after retries are replayed from here.
+    outbox.get_outbox()
+    threading.Thread(target=outbox.replay_loop, name="outbox", daemon=True).start()
+
+    if PROFILE_STAGES:
+        profiling.enable_stages(PROFILE_STAGES_FILE, PROFILE_STAGES_INTERVAL)
+    profiling.install_signal_handler(PROFILE_CAPTURE_SECONDS, PROFILE_DIR)
+    if PROFILE_CAPTURE_AT_START:
+        profiling.request_capture(PROFILE_CAPTURE_SECONDS, PROFILE_DIR)
+
+    if INTERPRETER_WATCH_SECONDS > 0:
+        threading.Thread(target=interpreter_watch_loop, daemon=True).start()
+
+    cursor_store = JsonStateStore(EVENT_CURSOR_FILE or None, save_interval=5)
+    ingest_threads = []
+
+    def start_host(host):
         try:
-            container = client.containers.get(container_id)
-            handle_container_event(container, docker_host, action=action)
-        except docker.errors.NotFound:
-            pass
+            ingest, coalescer = _watch_host(host, pool, cursor_store, make_damper)
         except Exception as e:
-            logger.error(f"Failed to handle {action} event for {container_id}: {e}")
+            logger.error(f"Could not start watching {host.name}: {e}")
+            return
+        coalescers.append(coalescer)
+        ingest_threads.append(ingest)
+
+    # Hosts start in parallel so one slow or unreachable daemon does not
+    # hold up the others' boot scans.
+    starters = [
+        threading.Thread(target=start_host, args=(host,), name=f"start-{host.name}", daemon=True)
+        for host in hosts
+    ]
+    for starter in starters:
+        starter.start()
+    for starter in starters:
+        starter.join()
+    for ingest in ingest_threads:
+        ingest.join()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,248 @@
+"""
+Minimal Prometheus-format metrics for docker-api-notifier.
+
+No third-party client library: counters, gauges and histograms are
+kept in process and rendered in the Prometheus text exposition format
+by a small HTTP server. Everything is cheap enough to update on every
+event whether or not the endpoint is enabled.
+
+Usage:
+
+    import metrics
+
+    metrics.EVENTS_RECEIVED.inc(action="start")
+    metrics.DELIVERY_LAG_SECONDS.observe(0.42, action="start")
+    metrics.QUEUE_DEPTH.set_function(lambda: pool.depth())
+
+    metrics.start_server(9464)   # GET /metrics
+
+Environment variables (read by main.py):
+    METRICS_PORT  Port for the /metrics endpoint. Unset or 0 disables it.
+    METRICS_BIND  Address to bind. Default 0.0.0.0.
+"""
+
+import bisect
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logging_setup import get_logger
+
+logger = get_logger("metrics")
+
+PREFIX = "docker_notifier_"
+
+LAG_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SWEEP_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Every metric registers itself here on construction; render() walks it.
+REGISTRY: list = []
+_LE_INF = 'le="+Inf"'
+
+
+def _label_key(labelnames: tuple, labels: dict) -> tuple:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, help_text):
+        super().__init__(name, help_text)
+        self._fn = None
+
+    def set_function(self, fn) -> None:
+        self._fn = fn
+
+    def _samples(self):
+        if self._fn is None:
+            return []
+        try:
+            value = float(self._fn())
+        except Exception as e:
+            logger.debug(f"Gauge {self.name} callback failed: {e}")
+            return []
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=REQUEST_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., count, sum]
+        self._values: dict = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += 1
+            entry[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            lines.append(
+                f"{self.name}_bucket{_format_labels(self.labelnames, key, _LE_INF)} {entry[-2]}"
+            )
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {entry[-2]}")
+            lines.append(
+                f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(entry[-1])}"
+            )
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in Prometheus text format."""
+    lines = []
+    for metric in list(REGISTRY):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Notifier metrics
+# ---------------------------------------------------------------------------
+
+EVENTS_RECEIVED = Counter(
+    "events_received_total", "Docker events read from the event stream.", ("action",))
+EVENTS_FILTERED = Counter(
+    "events_filtered_total", "Docker events dropped before dispatch.", ("action",))
+EVENTS_DISPATCHED = Counter(
+    "events_dispatched_total", "Container events handed to delivery after coalescing.", ("action",))
+DELIVERY_LAG_SECONDS = Histogram(
+    "delivery_lag_seconds",
+    "Time from the Docker event (timeNano) to completion of notifier delivery.",
+    ("action",), LAG_BUCKETS)
+NOTIFIER_REQUEST_SECONDS = Histogram(
+    "notifier_request_seconds", "Duration of one outbound notifier request attempt.",
+    ("notifier", "outcome"), REQUEST_BUCKETS)
+NOTIFIER_RETRIES = Counter(
+    "notifier_retries_total", "Notifier request attempts that failed and were retried.",
+    ("notifier",))
+NOTIFIER_FAILURES = Counter(
+    "notifier_failures_total", "Notifier requests that failed after all retries.",
+    ("notifier",))
+REFRESH_SWEEP_SECONDS = Histogram(
+    "refresh_sweep_seconds", "Time spent refreshing containers during one refresh interval.", (), SWEEP_BUCKETS)
+QUEUE_DEPTH = Gauge(
+    "queue_depth", "Events waiting for delivery (coalescer plus worker queues).")
+CIRCUIT_REJECTED = Counter(
+    "circuit_rejected_total", "Requests short-circuited because the endpoint's breaker was open.",
+    ("endpoint",))
+RETRY_PENDING = Gauge(
+    "retry_pending", "Failed notifier requests waiting in the retry scheduler for their backoff.")
+OUTBOX_PENDING = Gauge(
+    "outbox_pending", "Undelivered notifications waiting in the outbox for replay.")
+
+
+# ---------------------------------------------------------------------------
+# HTTP endpoint
+# ---------------------------------------------------------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port: int, bind: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics on a daemon thread and return the server."""
+    server = ThreadingHTTPServer((bind, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on http://{bind}:{server.server_port}/metrics")
+    return server
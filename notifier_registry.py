@@ -0,0 +1,196 @@
+"""
+Registry of notifier targets and concurrent fan-out.
+
+Each notifier module registers itself at import time, declaring the
+actions it fires on, instead of `main.py` hard-coding a trigger table
+and one dispatch branch per target:
+
+    import notifier_registry
+
+    notifier_registry.register_notifier(
+        "slack",                              # value in dockernotifier.notifiers
+        triggers={"start", "die"},
+        send=register,                        # register(**kwargs)
+        build=build_kwargs,                   # optional: add/validate kwargs
+    )
+
+For one container event `main.py` asks `interested()` which notifiers
+fire (opt-in label or `report_all`, action in `triggers`, not skipped
+while flapping), builds each one's kwargs and hands the calls to
+`fan_out()`. The calls run concurrently — the first on the calling
+thread, the rest on a shared executor — and `fan_out()` returns once
+all have finished, so per-container ordering in the delivery pool is
+kept. An exception in one notifier is logged and does not affect the
+others. A notifier's first HTTP attempt is the only blocking part
+(retries are deferred, see `retry.deliver`), so one event costs
+roughly the slowest target's round trip rather than the sum.
+
+`build(snapshot, base_kwargs, observe)` returns the kwargs for `send`,
+or None to skip this container. `observe()` returns the interpreter
+exposure observations for the container; it is computed on first use
+and shared between notifiers.
+
+Notifiers that support batching declare `send_many(items)` (a list
+of kwargs dicts) and `batch_enabled()`. Sweeps (boot, refresh)
+collect into the dict from `start_batches()` and deliver it with
+`flush_batches()`.
+
+Notifiers that keep per-container state (keyed `<docker_host>/<id>`)
+declare `forget(docker_host, container_id)`, called when a container
+is destroyed, and `prune(docker_host, live_ids)`, called after a
+resync with every container ID the daemon still has, so state for
+containers removed while nobody was watching is dropped too.
+
+Environment variables:
+    NOTIFIER_FANOUT_WORKERS  Threads shared by all concurrent notifier
+                             calls. Default 8.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import profiling
+from env_config import env_number
+from logging_setup import get_logger
+
+logger = get_logger("notifier_registry")
+
+# Real Docker events the notifier subscribes to.
+WATCHED_DOCKER_ACTIONS = frozenset({
+    "start", "stop", "die", "pause", "unpause",
+    "destroy", "kill", "update",
+})
+
+# Synthetic actions the notifier injects (not from Docker).
+SYNTHETIC_ACTIONS = frozenset({"boot", "refresh"})
+
+DEFAULT_FANOUT_WORKERS = 8
+
+
+@dataclass
+class Notifier:
+    """One registered notifier target."""
+    name: str
+    triggers: frozenset
+    send: Callable
+    build: Optional[Callable] = None
+    # Skip this notifier while the container is flap-suppressed.
+    skip_when_flapping: bool = False
+    send_many: Optional[Callable] = None
+    batch_enabled: Optional[Callable] = None
+    # Fire for every container, not only those with the opt-in label.
+    report_all: bool = False
+    forget: Optional[Callable] = None
+    prune: Optional[Callable] = None
+
+    def opted_in(self, opt_ins: frozenset) -> bool:
+        return self.report_all or self.name in opt_ins
+
+    def kwargs_for(self, snapshot, base_kwargs: dict, observe) -> Optional[dict]:
+        if self.build is None:
+            return dict(base_kwargs)
+        return self.build(snapshot, base_kwargs, observe)
+
+
+_notifiers: dict = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def register_notifier(name: str, triggers, send, build=None, skip_when_flapping: bool = False,
+                      send_many=None, batch_enabled=None, forget=None, prune=None) -> Notifier:
+    """Add (or replace) the notifier `name`; returns its registry entry."""
+    notifier = Notifier(
+        name=name, triggers=frozenset(triggers), send=send, build=build,
+        skip_when_flapping=skip_when_flapping, send_many=send_many,
+        batch_enabled=batch_enabled, forget=forget, prune=prune,
+    )
+    unknown = notifier.triggers - WATCHED_DOCKER_ACTIONS - SYNTHETIC_ACTIONS
+    if unknown:
+        logger.warning(f"Notifier {name} declares unknown trigger(s): {sorted(unknown)}")
+    _notifiers[name] = notifier
+    return notifier
+
+
+def get(name: str) -> Optional[Notifier]:
+    return _notifiers.get(name)
+
+
+def could_notify(opt_ins: frozenset) -> bool:
+    """Whether any notifier could ever fire for a container with these opt-ins."""
+    return any(n.opted_in(opt_ins) for n in _notifiers.values())
+
+
+def interested(opt_ins: frozenset, action: str, flapping: bool = False) -> list:
+    """Notifiers that should fire for `action` on a container with these opt-ins."""
+    return [
+        n for n in _notifiers.values()
+        if action in n.triggers and n.opted_in(opt_ins)
+        and not (flapping and n.skip_when_flapping)
+    ]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = env_number("NOTIFIER_FANOUT_WORKERS", DEFAULT_FANOUT_WORKERS, int)
+            _executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="fanout")
+        return _executor
+
+
+def _run(name: str, fn, kwargs: dict, subject: str) -> None:
+    try:
+        with profiling.capture():
+            fn(**kwargs)
+    except Exception as e:
+        logger.error(f"{name} notifier failed for {subject}: {e}")
+
+
+def fan_out(calls: list, subject: str) -> None:
+    """
+    Run `calls` — (notifier name, fn, kwargs) tuples — concurrently and
+    wait for all of them. Failures are logged per notifier.
+    """
+    if not calls:
+        return
+    futures = [_get_executor().submit(_run, name, fn, kwargs, subject) for name, fn, kwargs in calls[1:]]
+    _run(*calls[0], subject)
+    for future in futures:
+        future.result()
+
+
+def forget(docker_host: str, container_id: str) -> None:
+    """Drop every notifier's state for a destroyed container."""
+    for n in _notifiers.values():
+        if n.forget is not None:
+            n.forget(docker_host, container_id)
+
+
+def prune(docker_host: str, live_ids) -> None:
+    """Drop every notifier's state for containers on `docker_host` not in `live_ids`."""
+    live_ids = frozenset(live_ids)
+    for n in _notifiers.values():
+        if n.prune is not None:
+            n.prune(docker_host, live_ids)
+
+
+def start_batches():
+    """A batch dict for one sweep, with a list per notifier that batches; None if none do."""
+    batches = {
+        n.name: [] for n in _notifiers.values()
+        if n.send_many is not None and (n.batch_enabled is None or n.batch_enabled())
+    }
+    return batches or None
+
+
+def flush_batches(batches, subject: str = "sweep") -> None:
+    """Deliver every non-empty batch, notifiers concurrently."""
+    if not batches:
+        return
+    fan_out(
+        [(name, _notifiers[name].send_many, {"items": items}) for name, items in batches.items() if items],
+        subject,
+    )
@@ -1,15 +1,17 @@
 """
 Reference template for a new notifier module.
 
-This file is NOT wired into `main.py`'s dispatch. It exists as a
-copy-and-modify starting point for adding a new downstream target.
+This file is NOT imported by `main.py`, so it never registers. It
+exists as a copy-and-modify starting point for adding a new
+downstream target.
 
 To add a real notifier:
 
 1. Copy this file to `notifiers/<target>.py` (e.g. `slack.py`).
 2. Replace `_TARGET` placeholders with your target name.
 3. Define your wire format in `_to_payload()`.
-4. Wire the module into `main.py`'s dispatch (see PRD section 3.3).
+4. Set NAME and TRIGGERS at the bottom and import the module from
+   `main.py` so it registers itself (see PRD section 3.3).
 5. Document env vars and labels in `README.md`.
 6. Remove this top docstring; replace with module-specific docs.
 
@@ -19,21 +21,25 @@ in PRD section 3.3.
 
 import os
 import json
+import logging
 from datetime import datetime
 
 import requests
 
+import notifier_registry
+import retry
 from logging_setup import get_logger
-from retry import with_retry
+from http_transport import get_session
 
 # Replace "_template" with your target name (e.g. "slack").
 logger = get_logger("_template_notifier")
+# Pooled keep-alive session with default timeouts; see http_transport.py.
+_session = get_session("_template_notifier")
 
 
-@with_retry
 def _send(endpoint: str, payload: dict, headers: dict) -> requests.Response:
-    """The actual network call, wrapped with shared retry policy."""
-    response = requests.post(endpoint, json=payload, headers=headers)
+    """One attempt at the network call; `retry.deliver()` applies the retry policy."""
+    response = _session.post(endpoint, json=payload, headers=headers)
     response.raise_for_status()
     return response
 
@@ -62,11 +68,11 @@ def _to_payload(kwargs: dict) -> dict:
 
 def register(**kwargs) -> None:
     """
-    Entry point invoked by `main.py`.
+    Entry point invoked through the notifier registry.
 
-    Receives the base kwargs contract (PRD section 3.3) plus any
-    extras `main.py` passes for this specific notifier (typically
-    stripped `dockernotifier.<target>.*` labels).
+    Receives the base kwargs contract (PRD section 3.3) plus whatever
+    `build_kwargs()` adds for this notifier (typically stripped
+    `dockernotifier.<target>.*` labels).
     """
     # 1. Read required env vars. Return early if any are missing.
     target_url = os.environ.get("_TEMPLATE_URL")
@@ -91,15 +97,51 @@ def register(**kwargs) -> None:
         "Content-Type": "application/json",
     }
 
-    logger.debug("Sending payload:")
-    logger.debug(json.dumps(payload, indent=2))
+    # Only build the pretty-printed payload when DEBUG is on.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Sending payload:\n{json.dumps(payload, indent=2)}")
 
-    # 4. Send, catching only RequestException (transient failures).
-    #    Programming errors propagate to main.py's outer try/except.
-    try:
-        _send(target_url, payload, headers)
+    # 4. Send. The first attempt runs here; retries run later on the
+    #    shared retry scheduler, so this returns without sleeping.
+    #    Only RequestException is retried; other exceptions propagate
+    #    to the registry's fan-out, which logs them for this notifier
+    #    without affecting the others.
+    def on_success(_response):
         logger.debug(f"Successfully sent _template event for: {container_name}")
-    except requests.RequestException as e:
+
+    def on_failure(e):
         logger.error(
             f"Failed to send _template event for '{container_name}' after retries: {e}"
         )
+
+    retry.deliver(
+        f"_template/{kwargs.get('container_id') or container_name}",
+        _send, (target_url, payload, headers),
+        on_success=on_success, on_failure=on_failure,
+    )
+
+
+# Registration. NAME is the value containers list in the
+# `dockernotifier.notifiers` label; TRIGGERS are the actions (from
+# notifier_registry.WATCHED_DOCKER_ACTIONS / SYNTHETIC_ACTIONS) this
+# notifier fires on.
+NAME = "_template"
+TRIGGERS = {"start", "die"}
+_LABEL_PREFIX = "dockernotifier._template."
+
+
+def build_kwargs(snapshot, base_kwargs, observe):
+    """
+    register() kwargs for one container, or None to skip it. Add
+    target-specific extras here; `observe()` returns the interpreter
+    exposure observations if this target needs them.
+    """
+    extras = {
+        key[len(_LABEL_PREFIX):]: value
+        for key, value in snapshot.labels.items()
+        if key.startswith(_LABEL_PREFIX)
+    }
+    return {**base_kwargs, **extras}
+
+
+notifier_registry.register_notifier(NAME, TRIGGERS, register, build=build_kwargs)
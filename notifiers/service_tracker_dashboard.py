@@ -1,11 +1,48 @@
 import os
-import requests
+import hashlib
+import itertools
+import logging
+import threading
+import time
 from datetime import datetime
 import json
+from dataclasses import dataclass
+from typing import Optional
+import notifier_registry
+import outbox
+import profiling
 from logging_setup import get_logger
-from retry import with_retry
+import retry
+from circuit_breaker import CircuitOpenError, get_breaker, is_rejection
+from env_config import env_number
+from http_transport import get_session
+from state_store import JsonStateStore
 
 logger = get_logger("std_notifier")
+_session = get_session("std_notifier")
+
+# Change detection: `refresh` posts are skipped when the canonical
+# payload is identical to the last one STD accepted for that container,
+# unless STD_HEARTBEAT_SECONDS have passed since it was last sent.
+# Lifecycle events (start, die, ...) and `boot` always post.
+_TRUTHY = ("true", "1", "yes")
+DEFAULT_HEARTBEAT_SECONDS = 900
+
+# Fields that change on every call without the container changing.
+_VOLATILE_FIELDS = {"timestamp"}
+
+# Bulk registration (opt-in via STD_BULK_REGISTER). Statuses that mean
+# "this STD has no bulk endpoint"; once seen, every later batch goes
+# through single registration for the rest of the process.
+DEFAULT_BULK_MAX_ITEMS = 100
+_BULK_UNSUPPORTED_STATUSES = {404, 405, 501}
+_bulk_supported = None  # None = not yet probed
+# Bulk chunks never supersede each other's retries, so each gets its own key.
+_bulk_ids = itertools.count()
+
+# Payloads that fail after retries are queued here and replayed by the
+# outbox thread (see outbox.py); a later successful post resolves them.
+OUTBOX_NAME = "service-tracker-dashboard"
 
 
 # Map from "what arrives in kwargs" to "what STD's canonical schema expects".
@@ -77,56 +114,406 @@ def _to_canonical(kwargs: dict) -> dict:
     return out
 
 
-@with_retry
-def post_with_retry(endpoint, payload, headers):
-    response = requests.post(endpoint, json=payload, headers=headers)
+class _ChangeCache:
+    """
+    Per-container fingerprint of the last payload STD accepted.
+
+    Entries are `{"fingerprint": str, "sent_at": float}` keyed by
+    `<host>/<container_id>`; `sent_at` is wall-clock so a persisted
+    cache stays meaningful across restarts.
+    """
+
+    def __init__(self, store: JsonStateStore, heartbeat_seconds: int):
+        self.store = store
+        self.heartbeat_seconds = heartbeat_seconds
+
+    def is_unchanged(self, key: str, fingerprint: str) -> bool:
+        entry = self.store.get(key)
+        if not isinstance(entry, dict) or entry.get("fingerprint") != fingerprint:
+            return False
+        sent_at = entry.get("sent_at") or 0
+        return time.time() - sent_at < self.heartbeat_seconds
+
+    def record(self, key: str, fingerprint: str) -> None:
+        self.store.set(key, {"fingerprint": fingerprint, "sent_at": time.time()})
+
+    def forget(self, key: str) -> None:
+        self.store.delete(key)
+
+
+_change_cache = None
+_change_cache_lock = threading.Lock()
+
+
+def _get_change_cache():
+    """Build the change cache from env on first use; None when disabled."""
+    global _change_cache
+    if os.environ.get("STD_CHANGE_DETECTION", "true").strip().lower() not in _TRUTHY:
+        return None
+    with _change_cache_lock:
+        if _change_cache is None:
+            heartbeat = env_number("STD_HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS, int)
+            path = os.environ.get("STD_CHANGE_CACHE_FILE", "").strip() or None
+            _change_cache = _ChangeCache(JsonStateStore(path), heartbeat)
+        return _change_cache
+
+
+def flush_change_cache() -> None:
+    """Persist pending change-cache entries (called after each refresh sweep)."""
+    if _change_cache is not None:
+        _change_cache.store.flush()
+
+
+def forget(docker_host: str, container_id: str) -> None:
+    """Drop the change-cache entry of a destroyed container."""
+    change_cache = _get_change_cache()
+    if change_cache is not None:
+        change_cache.forget(f"{docker_host}/{container_id}")
+
+
+def prune(docker_host: str, live_ids) -> None:
+    """Drop change-cache entries for containers on `docker_host` that no longer exist."""
+    change_cache = _get_change_cache()
+    if change_cache is None:
+        return
+    prefix = f"{docker_host}/"
+    for key, _ in change_cache.store.items():
+        if key.startswith(prefix) and key[len(prefix):] not in live_ids:
+            change_cache.forget(key)
+
+
+def _fingerprint(payload: dict) -> str:
+    """Stable hash of a canonical payload, ignoring volatile fields."""
+    stable = {k: v for k, v in payload.items() if k not in _VOLATILE_FIELDS}
+    encoded = json.dumps(stable, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _cache_key(payload: dict) -> str:
+    container_ref = payload.get("container_id") or payload.get("container_name")
+    return f"{payload.get('host')}/{container_ref}"
+
+
+def _post_once(endpoint, payload, headers):
+    response = _session.post(endpoint, json=payload, headers=headers)
     response.raise_for_status()
     return response
 
 
-def register(**kwargs):
+def _post_bulk_once(endpoint, body, headers):
     """
-    Register a container with the Service Tracker Dashboard.
-
-    Receives the common notifier base kwargs contract (see PRD §3.3)
-    plus all stripped `dockernotifier.std.*` labels. The merged dict
-    is translated into STD v0.5.0's canonical schema via
-    `_to_canonical()` before being posted to `/api/v1/register`.
+    Like `_post_once`, but an "endpoint not supported" status is
+    returned to the caller instead of raised, so it is not retried.
     """
+    response = _session.post(endpoint, json=body, headers=headers)
+    if response.status_code in _BULK_UNSUPPORTED_STATUSES:
+        return response
+    response.raise_for_status()
+    return response
+
+
+@dataclass
+class _Prepared:
+    """One container's payload, ready to send."""
+    container_name: str
+    action: str
+    payload: dict
+    cache_key: str
+    fingerprint: Optional[str]
+
+
+def _settings():
+    """Return (dashboard_url, api_token), or None if STD is not configured."""
     dashboard_url = os.environ.get("STD_URL")
     api_token = os.environ.get("STD_API_TOKEN")
-
     if not dashboard_url or not api_token:
         logger.info("Not enabling Service Tracker Dashboard integration — missing STD_URL or STD_API_TOKEN")
-        return
+        return None
+    return dashboard_url, api_token
+
+
+def _headers(api_token: str) -> dict:
+    return {
+        "Authorization": f"Bearer {api_token}",
+        "Content-Type": "application/json",
+    }
+
 
+def _prepare(kwargs: dict, change_cache) -> Optional[_Prepared]:
+    """
+    Canonicalize one container's kwargs. Returns None when the payload
+    is invalid or when change detection says a refresh can be skipped.
+    """
     kwargs.setdefault("timestamp", datetime.now().isoformat())
 
     container_name = kwargs.get("container_name")
     action = kwargs.get("action", "event")
-    logger.info(f'STD notifier triggered for "{container_name}" on "{action}"')
 
-    payload = _to_canonical(kwargs)
+    with profiling.stage("std.canonicalize"):
+        payload = _to_canonical(kwargs)
 
     if "host" not in payload or "container_name" not in payload:
         logger.error(
             f"STD payload missing required fields after canonical translation; "
             f"skipping. Payload keys: {sorted(payload.keys())}"
         )
+        return None
+
+    cache_key = _cache_key(payload)
+    fingerprint = _fingerprint(payload) if change_cache is not None else None
+    if action == "refresh" and change_cache is not None \
+       and change_cache.is_unchanged(cache_key, fingerprint):
+        logger.debug(f"STD payload unchanged for {container_name}; skipping refresh")
+        return None
+
+    logger.info(
+        f'STD notifier triggered for "{container_name}" on "{action}"',
+        extra={"rate_key": "std.refresh"} if action == "refresh" else None,
+    )
+    return _Prepared(container_name, action, payload, cache_key, fingerprint)
+
+
+def _record_result(prepared: _Prepared, change_cache, ok: bool) -> None:
+    if ok:
+        outbox.resolve(OUTBOX_NAME, prepared.cache_key)
+    if change_cache is None:
         return
+    if ok:
+        change_cache.record(prepared.cache_key, prepared.fingerprint)
+    else:
+        change_cache.forget(prepared.cache_key)
+
+
+def _spool(prepared: _Prepared) -> None:
+    """Queue a failed payload in the outbox; re-queuing unchanged content is a no-op."""
+    outbox.put(
+        OUTBOX_NAME, prepared.cache_key, prepared.payload,
+        digest=prepared.fingerprint or _fingerprint(prepared.payload),
+    )
 
+
+def _send_single(prepared: _Prepared, dashboard_url: str, headers: dict, change_cache) -> bool:
+    """
+    POST one payload to /api/v1/register. Returns True if the first
+    attempt succeeded; otherwise retries continue in the background
+    (see `retry.deliver`) and the outcome is recorded when they finish.
+    """
     endpoint = f"{dashboard_url.rstrip('/')}/api/v1/register"
-    headers = {
-        "Authorization": f"Bearer {api_token}",
-        "Content-Type": "application/json",
-    }
 
-    logger.debug("Sending registration payload:")
-    logger.debug(json.dumps(payload, indent=2))
-    logger.debug(f"Endpoint: {endpoint}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Sending registration payload to {endpoint}:\n{json.dumps(prepared.payload, indent=2)}")
+
+    def on_success(_response):
+        logger.debug(
+            f"Successfully registered: {prepared.container_name} on {prepared.payload.get('host')}"
+        )
+        _record_result(prepared, change_cache, True)
+
+    def on_failure(e):
+        if is_rejection(e):
+            logger.error(f"STD rejected registration of container '{prepared.container_name}': {e}")
+        elif isinstance(e, CircuitOpenError):
+            logger.debug(f"STD circuit open; queued '{prepared.container_name}' in the outbox")
+            _spool(prepared)
+        else:
+            logger.error(f"Failed to register container '{prepared.container_name}' after retries: {e}")
+            _spool(prepared)
+        _record_result(prepared, change_cache, False)
+
+    return retry.deliver(
+        f"{OUTBOX_NAME}/{prepared.cache_key}", _post_once,
+        (endpoint, prepared.payload, headers),
+        on_success=on_success, on_failure=on_failure, breaker=get_breaker(endpoint),
+    )
+
+
+def _replay(payload: dict) -> None:
+    """Outbox handler: one attempt to register a payload that failed after retries."""
+    settings = _settings()
+    if settings is None:
+        raise RuntimeError("STD_URL or STD_API_TOKEN not set")
+    dashboard_url, api_token = settings
+    endpoint = f"{dashboard_url.rstrip('/')}/api/v1/register"
+    get_breaker(endpoint).call(_post_once, endpoint, payload, _headers(api_token))
+    change_cache = _get_change_cache()
+    if change_cache is not None:
+        change_cache.record(_cache_key(payload), _fingerprint(payload))
+
+
+outbox.register_handler(OUTBOX_NAME, _replay)
+
+
+def register(**kwargs):
+    """
+    Register a container with the Service Tracker Dashboard.
+
+    Receives the common notifier base kwargs contract (see PRD §3.3)
+    plus all stripped `dockernotifier.std.*` labels. The merged dict
+    is translated into STD v0.5.0's canonical schema via
+    `_to_canonical()` before being posted to `/api/v1/register`.
+
+    On `refresh`, the post is skipped when the payload fingerprint
+    matches the last one STD accepted and the heartbeat interval has
+    not elapsed (see `_ChangeCache`).
+    """
+    settings = _settings()
+    if settings is None:
+        return
+    dashboard_url, api_token = settings
+
+    change_cache = _get_change_cache()
+    prepared = _prepare(kwargs, change_cache)
+    if prepared is None:
+        return
+    _send_single(prepared, dashboard_url, _headers(api_token), change_cache)
+
+
+# ---------------------------------------------------------------------------
+# Bulk registration
+# ---------------------------------------------------------------------------
+
+def bulk_enabled() -> bool:
+    """True when STD_BULK_REGISTER is on; callers then batch via register_many()."""
+    return os.environ.get("STD_BULK_REGISTER", "false").strip().lower() in _TRUTHY
 
+
+def register_many(items: list) -> list:
+    """
+    Register many containers, batching them into bulk requests.
+
+    `items` is a list of kwargs dicts, each exactly what `register()`
+    would receive. Payloads are canonicalized and change-filtered the
+    same way, split into chunks of at most STD_BULK_MAX_ITEMS, and
+    POSTed to `/api/v1/register/bulk` as `{"items": [payload, ...]}`.
+
+    STD answers with `{"results": [{"ok": bool, "error": str}, ...]}`,
+    one entry per item in request order; a missing `results` list
+    means every item was accepted. If the server does not expose the
+    bulk endpoint (404/405/501), the notifier remembers that for the
+    rest of the process and falls back to one `register()` per item.
+
+    A chunk whose request fails is retried in the background like a
+    single registration; its results are applied when the retry
+    finishes. Returns the container names that were not registered by
+    the first attempt.
+    """
+    settings = _settings()
+    if settings is None:
+        return []
+    dashboard_url, api_token = settings
+    headers = _headers(api_token)
+
+    change_cache = _get_change_cache()
+    prepared = [p for p in (_prepare(kwargs, change_cache) for kwargs in items) if p is not None]
+    if not prepared:
+        return []
+
+    failed = []
+    chunk_size = max(1, env_number("STD_BULK_MAX_ITEMS", DEFAULT_BULK_MAX_ITEMS, int))
+    endpoint = f"{dashboard_url.rstrip('/')}/api/v1/register/bulk"
+    for start in range(0, len(prepared), chunk_size):
+        chunk = prepared[start:start + chunk_size]
+        if _bulk_supported is False:
+            failed.extend(
+                p.container_name for p in chunk
+                if not _send_single(p, dashboard_url, headers, change_cache)
+            )
+            continue
+
+        logger.debug(f"Sending bulk registration of {len(chunk)} item(s) to {endpoint}")
+        outcome = []
+
+        def on_success(response, chunk=chunk, outcome=outcome):
+            outcome.extend(_handle_bulk_response(chunk, response, dashboard_url, headers, change_cache))
+
+        def on_failure(e, chunk=chunk):
+            rejected = is_rejection(e)
+            if rejected:
+                logger.error(f"STD rejected bulk registration of {len(chunk)} container(s): {e}")
+            elif isinstance(e, CircuitOpenError):
+                logger.debug(f"STD circuit open; queued {len(chunk)} container(s) in the outbox")
+            else:
+                logger.error(f"Bulk registration of {len(chunk)} container(s) failed after retries: {e}")
+            for p in chunk:
+                if not rejected:
+                    _spool(p)
+                _record_result(p, change_cache, False)
+
+        delivered = retry.deliver(
+            f"{OUTBOX_NAME}/bulk/{next(_bulk_ids)}", _post_bulk_once,
+            (endpoint, {"items": [p.payload for p in chunk]}, headers),
+            on_success=on_success, on_failure=on_failure, breaker=get_breaker(endpoint),
+        )
+        failed.extend(outcome if delivered else (p.container_name for p in chunk))
+
+    return failed
+
+
+def _handle_bulk_response(chunk: list, response, dashboard_url: str, headers: dict,
+                          change_cache) -> list:
+    """Apply a bulk response (or fall back to single posts); return names not registered."""
+    global _bulk_supported
+    if response.status_code in _BULK_UNSUPPORTED_STATUSES:
+        logger.warning(
+            f"STD does not support bulk registration (HTTP {response.status_code}); "
+            f"falling back to single registration"
+        )
+        _bulk_supported = False
+        return [
+            p.container_name for p in chunk
+            if not _send_single(p, dashboard_url, headers, change_cache)
+        ]
+    _bulk_supported = True
+    return _apply_bulk_results(chunk, response, change_cache)
+
+
+def _apply_bulk_results(chunk: list, response, change_cache) -> list:
+    """Match per-item results to the chunk; queue failed items in the outbox and return their names."""
     try:
-        post_with_retry(endpoint, payload, headers)
-        logger.debug(f"Successfully registered: {container_name} on {payload.get('host')}")
-    except requests.RequestException as e:
-        logger.error(f"Failed to register container '{container_name}' after retries: {e}")
+        results = (response.json() or {}).get("results")
+    except ValueError:
+        results = None
+    if not isinstance(results, list):
+        results = [{"ok": True}] * len(chunk)
+    elif len(results) != len(chunk):
+        logger.warning(
+            f"Bulk response has {len(results)} result(s) for {len(chunk)} item(s); "
+            f"treating unmatched items as failed"
+        )
+
+    failed = []
+    for index, prepared in enumerate(chunk):
+        result = results[index] if index < len(results) else {"ok": False, "error": "no result"}
+        ok = isinstance(result, dict) and bool(result.get("ok"))
+        if ok:
+            logger.debug(
+                f"Successfully registered: {prepared.container_name} on {prepared.payload.get('host')}"
+            )
+        else:
+            error = result.get("error") if isinstance(result, dict) else result
+            logger.error(f"Failed to register container '{prepared.container_name}' in bulk: {error}")
+            failed.append(prepared.container_name)
+            _spool(prepared)
+        _record_result(prepared, change_cache, ok)
+    return failed
+
+
+# ---------------------------------------------------------------------------
+# Registration with the notifier registry
+# ---------------------------------------------------------------------------
+
+# Value of the `dockernotifier.notifiers` label that opts a container in.
+NAME = "service-tracker-dashboard"
+TRIGGERS = notifier_registry.WATCHED_DOCKER_ACTIONS | notifier_registry.SYNTHETIC_ACTIONS
+
+
+def build_kwargs(snapshot, base_kwargs, observe):
+    """Base kwargs plus the stripped `dockernotifier.std.*` labels and exposure observations."""
+    return {**base_kwargs, **dict(snapshot.std_extras), "exposure_observations": observe()}
+
+
+notifier_registry.register_notifier(
+    NAME, TRIGGERS, register, build=build_kwargs,
+    send_many=register_many, batch_enabled=bulk_enabled,
+    forget=forget, prune=prune,
+)
@@ -1,20 +1,121 @@
 import os
-import requests
+import threading
+import time
 import urllib.parse
 from datetime import datetime
+import notifier_registry
+import outbox
 from logging_setup import get_logger
-from retry import with_retry
+import retry
+from circuit_breaker import CircuitOpenError, RequestRejected, get_breaker, is_rejection
+from env_config import env_number
+from http_transport import get_session
+from state_store import JsonStateStore
 
 logger = get_logger("dns_notifier")
+_session = get_session("dns_notifier")
 
+# Applied-record cache: the last (fqdn, zone, value) Technitium accepted
+# per container. A `boot`/`start` whose record already matches is a
+# no-op; entries older than DNS_REVALIDATE_SECONDS are re-sent so a
+# record changed or deleted on the server side is eventually repaired.
+# `refresh` only sends when the entry is missing or due for revalidation.
+DEFAULT_STATE_FILE = "/config/dns_state.json"
+DEFAULT_REVALIDATE_SECONDS = 21600
+REVALIDATE_SECONDS = env_number("DNS_REVALIDATE_SECONDS", DEFAULT_REVALIDATE_SECONDS, int)
 
-@with_retry
-def _do_dns_update(dns_url, params):
-    response = requests.get(dns_url, params=params)
+_state = None
+_state_lock = threading.Lock()
+
+# `<docker_host>/<container_id>` already warned about for incomplete labels.
+_warned_incomplete = set()
+
+
+def _get_state() -> JsonStateStore:
+    global _state
+    with _state_lock:
+        if _state is None:
+            path = os.environ.get("DNS_STATE_FILE", DEFAULT_STATE_FILE).strip() or None
+            _state = JsonStateStore(path)
+        return _state
+
+
+def flush_state() -> None:
+    """Persist pending applied-record entries (called after each refresh sweep)."""
+    if _state is not None:
+        _state.flush()
+
+
+def forget(docker_host: str, container_id: str) -> None:
+    """Drop the applied-record entry of a destroyed container."""
+    _get_state().delete(f"{docker_host}/{container_id}")
+    _warned_incomplete.discard(f"{docker_host}/{container_id}")
+
+
+def prune(docker_host: str, live_ids) -> None:
+    """Drop applied-record entries for containers on `docker_host` that no longer exist."""
+    prefix = f"{docker_host}/"
+
+    def gone(key):
+        return key.startswith(prefix) and key[len(prefix):] not in live_ids
+
+    state = _get_state()
+    for key, _ in state.items():
+        if gone(key):
+            state.delete(key)
+    _warned_incomplete.difference_update([key for key in list(_warned_incomplete) if gone(key)])
+
+
+def _is_applied(key: str, record: dict) -> bool:
+    """True if `record` matches what was last applied and is not due for revalidation."""
+    entry = _get_state().get(key)
+    if not isinstance(entry, dict):
+        return False
+    if any(entry.get(field) != record[field] for field in ("fqdn", "zone", "value")):
+        return False
+    return time.time() - (entry.get("applied_at") or 0) < REVALIDATE_SECONDS
+
+
+OUTBOX_NAME = "dns"
+
+
+def _send_dns_update(dns_url, params):
+    """
+    One attempt at the Technitium add-record call. Technitium reports API
+    errors as HTTP 200 with `{"status": "error", ...}`; anything but
+    `"ok"` raises `RequestRejected`.
+    """
+    response = _session.get(dns_url, params=params)
     response.raise_for_status()
+    try:
+        body = response.json()
+    except ValueError:
+        raise RequestRejected(f"Technitium returned a non-JSON response: {response.text[:200]!r}")
+    status = body.get("status") if isinstance(body, dict) else None
+    if status != "ok":
+        error = body.get("errorMessage") if isinstance(body, dict) else None
+        raise RequestRejected(f"Technitium returned status {status!r}: {error or response.text[:200]}")
     return response
 
 
+def _replay(entry):
+    """
+    Outbox handler: re-send one update that failed after retries.
+
+    The stored params omit the API token; the current one is read
+    from the environment.
+    """
+    dns_url = os.environ.get("DNS_SERVER_URL")
+    token = os.environ.get("DNS_SERVER_API_TOKEN")
+    if not dns_url or not token:
+        raise RuntimeError("Missing DNS_SERVER_URL or DNS_SERVER_API_TOKEN")
+    get_breaker(dns_url).call(_send_dns_update, dns_url, {**entry["params"], "token": token})
+    _get_state().set(entry["state_key"], {**entry["record"], "applied_at": time.time()})
+
+
+outbox.register_handler(OUTBOX_NAME, _replay)
+
+
 def register(*, container_fqdn, zone, value, **kwargs):
     """
     Register a CNAME with Technitium DNS.
@@ -26,6 +127,12 @@ def register(*, container_fqdn, zone, value, **kwargs):
     log lines and the record comment. Unrecognised kwargs are
     ignored, which keeps the signature forward-compatible as the
     contract grows.
+
+    Skips the update when the same record was already applied for
+    this container within DNS_REVALIDATE_SECONDS. A failed update is
+    retried in the background (see `retry.deliver`); one that still
+    fails after retries is queued in the outbox and replayed once
+    Technitium is reachable again.
     """
     dns_url = os.environ.get("DNS_SERVER_URL")
     token = os.environ.get("DNS_SERVER_API_TOKEN")
@@ -38,7 +145,16 @@ def register(*, container_fqdn, zone, value, **kwargs):
     stack_name = kwargs.get("stack_name")
     action = kwargs.get("action", "<unknown>")
 
-    logger.info(f'DNS notifier triggered for "{container_name}" due to "{action}"')
+    state_key = f"{docker_host}/{kwargs.get('container_id') or container_name}"
+    record = {"fqdn": container_fqdn, "zone": zone, "value": value}
+    if _is_applied(state_key, record):
+        logger.debug(f"DNS record {container_fqdn} -> {value} already applied; skipping")
+        return
+
+    logger.info(
+        f'DNS notifier triggered for "{container_name}" due to "{action}"',
+        extra={"rate_key": "dns.refresh"} if action == "refresh" else None,
+    )
 
     timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S%z")
     if stack_name:
@@ -57,8 +173,61 @@ def register(*, container_fqdn, zone, value, **kwargs):
         "comments": comment,
     }
 
-    try:
-        response = _do_dns_update(dns_url, params)
+    def on_success(response):
         logger.info(f'DNS update response for {container_fqdn}: {response.text}')
-    except requests.RequestException as e:
-        logger.error(f'DNS update failed for {container_name} after retries: {e}')
+        _get_state().set(state_key, {**record, "applied_at": time.time()})
+        outbox.resolve(OUTBOX_NAME, state_key)
+
+    def on_failure(e):
+        _get_state().delete(state_key)
+        if is_rejection(e):
+            logger.error(f'DNS update for {container_name} rejected by Technitium: {e}')
+            return
+        if isinstance(e, CircuitOpenError):
+            logger.debug(f'DNS circuit open; queued {container_fqdn} in the outbox')
+        else:
+            logger.error(f'DNS update failed for {container_name} after retries: {e}')
+        spooled = {k: v for k, v in params.items() if k != "token"}
+        outbox.put(
+            OUTBOX_NAME, state_key, {"state_key": state_key, "record": record, "params": spooled},
+            digest=record,
+        )
+
+    # Retries run on the shared retry scheduler; this returns after the first attempt.
+    retry.deliver(
+        f"{OUTBOX_NAME}/{state_key}", _send_dns_update, (dns_url, params),
+        on_success=on_success, on_failure=on_failure, breaker=get_breaker(dns_url),
+    )
+
+
+# Value of the `dockernotifier.notifiers` label that opts a container in.
+NAME = "dns"
+# `refresh` is a no-op unless the applied-record cache says the record
+# is missing or due for revalidation.
+TRIGGERS = {"boot", "start", "refresh"}
+
+
+def build_kwargs(snapshot, base_kwargs, observe):
+    """register() kwargs from the container's DNS labels; None when they are incomplete."""
+    container_hostname, zone, docker_domain = snapshot.dns
+    if not (container_hostname and zone and docker_domain):
+        # Labels are fixed for a container's lifetime: warn once, not every refresh.
+        warned_key = f"{base_kwargs['docker_host']}/{snapshot.id}"
+        if warned_key in _warned_incomplete:
+            logger.debug(f"Missing DNS label info for {snapshot.name}, skipping DNS registration")
+        else:
+            _warned_incomplete.add(warned_key)
+            logger.warning(f"Missing DNS label info for {snapshot.name}, skipping DNS registration")
+        return None
+    return {
+        **base_kwargs,
+        "container_fqdn": f"{container_hostname}.{zone}",
+        "zone": zone,
+        "value": f"{base_kwargs['docker_host']}.{docker_domain}",
+    }
+
+
+notifier_registry.register_notifier(
+    NAME, TRIGGERS, register, build=build_kwargs, skip_when_flapping=True,
+    forget=forget, prune=prune,
+)
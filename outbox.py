@@ -0,0 +1,325 @@
+"""
+Durable outbox for notifications that failed after all retries.
+
+When a notifier gives up on a delivery it hands the request to the
+outbox instead of dropping it. The outbox keeps only the latest
+pending request per (notifier, key) — a newer failure for the same
+container replaces the older one, and a later successful delivery
+resolves it — and a background thread replays pending requests with
+exponential backoff until the target accepts them.
+
+Usage from a notifier module:
+
+    import outbox
+
+    def _replay(payload):            # one attempt; raise on failure
+        ...
+
+    outbox.register_handler("dns", _replay)
+
+    outbox.put("dns", state_key, payload, digest=record)  # after retries are exhausted
+    outbox.resolve("dns", state_key)         # after a successful delivery
+
+Handlers are called from the replay thread with the stored payload and
+must raise `requests.RequestException` (or any exception) on failure.
+Payloads are stored as JSON, so they must not contain credentials;
+handlers read those from the environment at replay time. When a
+request fails because the target is down (connection error, timeout,
+5xx or an open circuit), the rest of that notifier's queue waits for
+the next round, so an unreachable target is probed once per backoff
+step rather than once per pending container. A request the target
+rejects (4xx, see `circuit_breaker.is_rejection`) can never succeed
+as stored and is dropped with a warning; any other error backs off
+only that entry.
+
+While a target is down every send for it fails, often with the same
+content each time (refreshes, an open circuit). `digest` identifies a
+payload's content — it defaults to the payload itself; notifiers whose
+payloads carry a timestamp pass a fingerprint instead — and a `put`
+whose digest matches the pending entry for that key is a no-op: no
+disk write, no reset of its backoff. Only the first entry queued for a
+notifier is logged at INFO level; the rest, and replacements, at DEBUG.
+
+On disk the outbox is an append-only JSON-lines log of `put` and
+`done` records. It is replayed into memory at startup and rewritten
+with only the pending entries (compacted) whenever the log grows past
+twice the pending count, so its size stays proportional to the number
+of undelivered notifications. At most `max_entries` are kept; beyond
+that the oldest entry is dropped with a warning.
+
+Environment variables:
+    OUTBOX_FILE               Log path. Default /config/outbox.jsonl;
+                              empty keeps the outbox in memory only.
+    OUTBOX_MAX_ENTRIES        Maximum pending notifications. Default 1000.
+    OUTBOX_RETRY_MIN_SECONDS  First replay backoff. Default 30.
+    OUTBOX_RETRY_MAX_SECONDS  Backoff ceiling. Default 600.
+"""
+
+import json
+import os
+import threading
+import time
+
+import metrics
+from circuit_breaker import CircuitOpenError, is_breaker_failure, is_rejection
+from env_config import env_number
+from logging_setup import get_logger
+
+logger = get_logger("outbox")
+
+DEFAULT_FILE = "/config/outbox.jsonl"
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_RETRY_MIN_SECONDS = 30.0
+DEFAULT_RETRY_MAX_SECONDS = 600.0
+# Compact once the log holds this many more records than there are pending entries.
+COMPACT_SLACK = 100
+
+
+class Outbox:
+    """Latest-pending-state spool keyed by (notifier, key)."""
+
+    def __init__(self, path=None, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 retry_min: float = DEFAULT_RETRY_MIN_SECONDS,
+                 retry_max: float = DEFAULT_RETRY_MAX_SECONDS):
+        self.path = path or None
+        self.max_entries = max(1, max_entries)
+        self.retry_min = retry_min
+        self.retry_max = max(retry_max, retry_min)
+        self._lock = threading.Lock()
+        # (notifier, key) -> {"payload", "queued_at", "attempts", "next_at"};
+        # dict order is insertion order, so the first entry is the oldest.
+        self._pending: dict = {}
+        self._log_records = 0
+        if self.path:
+            self._load()
+            self._compact_locked()
+
+    def put(self, notifier: str, key: str, payload: dict, digest=None) -> None:
+        """
+        Queue (or replace) the pending request for (notifier, key). A no-op
+        when the pending request has the same `digest` (default: the payload).
+        """
+        entry_key = (notifier, key)
+        digest = payload if digest is None else digest
+        now = time.time()
+        with self._lock:
+            previous = self._pending.pop(entry_key, None)
+            if previous is not None and previous["digest"] == digest:
+                self._pending[entry_key] = previous
+                logger.debug(f"{notifier} notification for {key} already queued unchanged")
+                return
+            first = previous is None and not any(n == notifier for n, _ in self._pending)
+            self._pending[entry_key] = {
+                "payload": payload, "digest": digest, "queued_at": now, "attempts": 0,
+                "next_at": now + self.retry_min,
+            }
+            self._append_locked(_put_record(notifier, key, self._pending[entry_key]))
+            while len(self._pending) > self.max_entries:
+                (old_notifier, old_key), _ = next(iter(self._pending.items()))
+                del self._pending[(old_notifier, old_key)]
+                self._append_locked({"n": old_notifier, "k": old_key, "done": True})
+                logger.warning(
+                    f"Outbox full ({self.max_entries}); dropped oldest {old_notifier} "
+                    f"notification for {old_key}"
+                )
+            self._maybe_compact_locked()
+        if first:
+            logger.info(f"Queued {notifier} notification for {key} for later delivery")
+        else:
+            logger.debug(f"Queued {notifier} notification for {key} for later delivery")
+
+    def resolve(self, notifier: str, key: str) -> None:
+        """Drop any pending request for (notifier, key); cheap when there is none."""
+        with self._lock:
+            if self._pending.pop((notifier, key), None) is None:
+                return
+            self._append_locked({"n": notifier, "k": key, "done": True})
+            self._maybe_compact_locked()
+
+    def due(self, now: float = None) -> list:
+        """Pending entries whose backoff has elapsed, oldest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            return [
+                (notifier, key, dict(entry))
+                for (notifier, key), entry in self._pending.items()
+                if entry["next_at"] <= now
+            ]
+
+    def mark_failed(self, notifier: str, key: str, queued_at: float) -> None:
+        """Push the entry's next attempt out by its backoff (if it was not replaced meanwhile)."""
+        with self._lock:
+            entry = self._pending.get((notifier, key))
+            if entry is None or entry["queued_at"] != queued_at:
+                return
+            entry["attempts"] += 1
+            delay = min(self.retry_min * 2 ** entry["attempts"], self.retry_max)
+            entry["next_at"] = time.time() + delay
+
+    def mark_delivered(self, notifier: str, key: str, queued_at: float) -> None:
+        """Resolve the entry, unless a newer request for the same key replaced it."""
+        self.discard(notifier, key, queued_at)
+
+    def discard(self, notifier: str, key: str, queued_at: float) -> None:
+        """Drop the entry undelivered, unless a newer request for the same key replaced it."""
+        with self._lock:
+            entry = self._pending.get((notifier, key))
+            if entry is None or entry["queued_at"] != queued_at:
+                return
+            del self._pending[(notifier, key)]
+            self._append_locked({"n": notifier, "k": key, "done": True})
+            self._maybe_compact_locked()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    # -- persistence --------------------------------------------------------
+
+    def _append_locked(self, record: dict) -> None:
+        self._log_records += 1
+        if not self.path:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.warning(f"Could not append to outbox {self.path}: {e}")
+
+    def _maybe_compact_locked(self) -> None:
+        if self._log_records > 2 * len(self._pending) + COMPACT_SLACK:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        self._log_records = len(self._pending)
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for (notifier, key), entry in self._pending.items():
+                    f.write(json.dumps(_put_record(notifier, key, entry), separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not compact outbox {self.path}: {e}")
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.warning(f"Ignoring unreadable outbox {self.path}: {e}")
+            return
+        now = time.time()
+        for line in lines:
+            try:
+                record = json.loads(line)
+                entry_key = (record["n"], record["k"])
+            except (ValueError, KeyError, TypeError):
+                # A torn final line from a crash mid-write; everything before it is intact.
+                continue
+            self._pending.pop(entry_key, None)
+            if not record.get("done"):
+                payload = record.get("p")
+                self._pending[entry_key] = {
+                    "payload": payload, "digest": record.get("d", payload),
+                    "queued_at": record.get("t") or now,
+                    "attempts": 0, "next_at": now,
+                }
+        while len(self._pending) > self.max_entries:
+            del self._pending[next(iter(self._pending))]
+        if self._pending:
+            logger.info(f"Loaded {len(self._pending)} undelivered notification(s) from {self.path}")
+
+
+def _put_record(notifier: str, key: str, entry: dict) -> dict:
+    record = {"n": notifier, "k": key, "p": entry["payload"], "t": entry["queued_at"]}
+    if entry["digest"] is not entry["payload"]:
+        record["d"] = entry["digest"]
+    return record
+
+
+# ---------------------------------------------------------------------------
+# Process-wide outbox and replay
+# ---------------------------------------------------------------------------
+
+_handlers: dict = {}
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Outbox:
+    """The shared outbox, configured from the environment on first use."""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox(
+                os.environ.get("OUTBOX_FILE", DEFAULT_FILE).strip() or None,
+                max_entries=env_number("OUTBOX_MAX_ENTRIES", DEFAULT_MAX_ENTRIES, int),
+                retry_min=env_number("OUTBOX_RETRY_MIN_SECONDS", DEFAULT_RETRY_MIN_SECONDS),
+                retry_max=env_number("OUTBOX_RETRY_MAX_SECONDS", DEFAULT_RETRY_MAX_SECONDS),
+            )
+            metrics.OUTBOX_PENDING.set_function(_outbox.__len__)
+        return _outbox
+
+
+def register_handler(notifier: str, handler) -> None:
+    """Register the single-attempt replay function for `notifier`."""
+    _handlers[notifier] = handler
+
+
+def put(notifier: str, key: str, payload: dict, digest=None) -> None:
+    get_outbox().put(notifier, key, payload, digest)
+
+
+def resolve(notifier: str, key: str) -> None:
+    get_outbox().resolve(notifier, key)
+
+
+def replay_once() -> int:
+    """Attempt every due entry once; return how many were delivered."""
+    box = get_outbox()
+    delivered = {}
+    blocked = set()
+    for notifier, key, entry in box.due():
+        handler = _handlers.get(notifier)
+        if handler is None:
+            continue
+        if notifier in blocked:
+            # Target already failed this round; back off without probing it again.
+            box.mark_failed(notifier, key, entry["queued_at"])
+            continue
+        try:
+            handler(entry["payload"])
+        except Exception as e:
+            if is_rejection(e):
+                box.discard(notifier, key, entry["queued_at"])
+                logger.warning(f"Dropping queued {notifier} notification for {key}; target rejected it: {e}")
+                continue
+            if isinstance(e, CircuitOpenError) or is_breaker_failure(e):
+                blocked.add(notifier)
+            box.mark_failed(notifier, key, entry["queued_at"])
+            logger.debug(f"Outbox replay of {notifier} notification for {key} failed: {e}")
+            continue
+        box.mark_delivered(notifier, key, entry["queued_at"])
+        delivered[notifier] = delivered.get(notifier, 0) + 1
+        logger.debug(f"Delivered queued {notifier} notification for {key}")
+    for notifier, count in delivered.items():
+        logger.info(f"Delivered {count} queued {notifier} notification(s)")
+    return sum(delivered.values())
+
+
+def replay_loop(interval: float = 5.0) -> None:
+    """Background thread body: replay due entries every `interval` seconds."""
+    while True:
+        time.sleep(interval)
+        try:
+            replay_once()
+        except Exception as e:
+            logger.error(f"Outbox replay failed: {e}")
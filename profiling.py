@@ -0,0 +1,243 @@
+"""
+Opt-in per-stage timing and on-demand cProfile capture.
+
+Stage timing: code wraps the expensive steps of handling one event in
+`stage()`. When stage timing is enabled, each block's wall time is
+aggregated per stage name (count, total, max) and written periodically
+as JSON, so you can see where events spend their time in production.
+When it is disabled, `stage()` returns a shared no-op context manager.
+
+    import profiling
+
+    with profiling.stage("docker.inspect"):
+        container = client.containers.get(container_id)
+
+Stages recorded by the notifier:
+    docker.inspect        client.containers.get() for a live event
+    snapshot              parsing an inspect document into a ContainerSnapshot
+    extract               building the base notifier kwargs from a snapshot
+    interpreters          _run_interpreters()
+    std.canonicalize      STD payload canonicalization
+    http.<notifier>       a notifier's first HTTP attempt only; retries run
+                          on the retry scheduler (see retry.py)
+
+cProfile capture: worker jobs (event delivery, boot scan, refresh
+sweep) run inside `capture()`. After `request_capture(seconds)` —
+from SIGUSR1 or at startup — every such job on every thread runs under
+its own cProfile profiler until the window closes. The profiles are
+then merged into one `.pstats` file, readable with
+`python -m pstats <file>` or snakeviz.
+
+    docker kill --signal=USR1 docker-api-notifier
+
+Environment variables (read by main.py):
+    PROFILE_STAGES            Enable stage timing. Default false.
+    PROFILE_STAGES_FILE       Where stage timings are written.
+                              Default /config/profile_stages.json.
+    PROFILE_STAGES_INTERVAL   Seconds between writes. Default 60.
+    PROFILE_CAPTURE_SECONDS   Length of a cProfile capture window. Default 30.
+    PROFILE_CAPTURE_AT_START  Start one capture window at startup. Default false.
+    PROFILE_DIR               Directory for .pstats files. Default /config.
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+
+from logging_setup import get_logger
+
+logger = get_logger("profiling")
+
+DEFAULT_STAGES_FILE = "/config/profile_stages.json"
+DEFAULT_PROFILE_DIR = "/config"
+
+_NULL_STAGE = contextlib.nullcontext()
+
+_stages_enabled = False
+_stages_lock = threading.Lock()
+# stage name -> [count, total_seconds, max_seconds]
+_stages: dict = {}
+_stages_since = None
+
+
+class _StageTimer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        with _stages_lock:
+            entry = _stages.get(self.name)
+            if entry is None:
+                _stages[self.name] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+        return False
+
+
+def stage(name: str):
+    """Context manager timing one stage; a no-op unless stage timing is enabled."""
+    if not _stages_enabled:
+        return _NULL_STAGE
+    return _StageTimer(name)
+
+
+def stage_snapshot() -> dict:
+    """Aggregated stage timings in milliseconds, keyed by stage name."""
+    with _stages_lock:
+        items = sorted((name, list(entry)) for name, entry in _stages.items())
+    return {
+        name: {
+            "count": count,
+            "total_ms": round(total * 1000, 3),
+            "mean_ms": round(total * 1000 / count, 3),
+            "max_ms": round(peak * 1000, 3),
+        }
+        for name, (count, total, peak) in items
+    }
+
+
+def _write_stages(path: str) -> None:
+    report = {
+        "since": _stages_since,
+        "written_at": datetime.now(timezone.utc).isoformat(),
+        "stages": stage_snapshot(),
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+
+
+def enable_stages(path: str = DEFAULT_STAGES_FILE, interval: float = 60) -> None:
+    """Turn on stage timing and write the aggregate to `path` every `interval` seconds."""
+    global _stages_enabled, _stages_since
+    _stages_since = datetime.now(timezone.utc).isoformat()
+    _stages_enabled = True
+
+    def writer():
+        while True:
+            time.sleep(interval)
+            try:
+                _write_stages(path)
+            except OSError as e:
+                logger.warning(f"Could not write stage timings to {path}: {e}")
+
+    threading.Thread(target=writer, name="profile-stages", daemon=True).start()
+    logger.info(f"Stage timing enabled; writing to {path} every {interval:g} sec")
+
+
+# ---------------------------------------------------------------------------
+# cProfile capture
+# ---------------------------------------------------------------------------
+
+class _CaptureSession:
+    def __init__(self, seconds: float, directory: str):
+        self.seconds = seconds
+        self.directory = directory
+        self.started_at = datetime.now(timezone.utc)
+        self.profiles: list = []
+        self.lock = threading.Lock()
+
+
+_capture_lock = threading.Lock()
+_capture: _CaptureSession = None
+_local = threading.local()
+
+
+@contextlib.contextmanager
+def capture():
+    """Run the enclosed job under cProfile while a capture window is open."""
+    session = _capture
+    if session is None or getattr(_local, "active", False):
+        yield
+        return
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler already owns this thread (or the interpreter).
+        yield
+        return
+    _local.active = True
+    try:
+        yield
+    finally:
+        profile.disable()
+        _local.active = False
+        with session.lock:
+            session.profiles.append(profile)
+
+
+def request_capture(seconds: float, directory: str = DEFAULT_PROFILE_DIR) -> bool:
+    """
+    Open a cProfile capture window of `seconds`. Returns False if one is
+    already running.
+    """
+    global _capture
+    with _capture_lock:
+        if _capture is not None:
+            logger.info("cProfile capture already in progress; ignoring request")
+            return False
+        session = _capture = _CaptureSession(seconds, directory)
+    timer = threading.Timer(seconds, _finish_capture, args=(session,))
+    timer.daemon = True
+    timer.start()
+    logger.info(f"cProfile capture started for {seconds:g} sec")
+    return True
+
+
+def _finish_capture(session: _CaptureSession) -> None:
+    global _capture
+    with _capture_lock:
+        if _capture is session:
+            _capture = None
+    with session.lock:
+        profiles = list(session.profiles)
+    if not profiles:
+        logger.info("cProfile capture finished; no jobs ran during the window")
+        return
+    stamp = session.started_at.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(session.directory, f"profile-{stamp}.pstats")
+    try:
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+    except (OSError, TypeError) as e:
+        logger.warning(f"Could not write cProfile capture to {path}: {e}")
+        return
+    logger.info(f"cProfile capture of {len(profiles)} job(s) written to {path}")
+
+
+def install_signal_handler(seconds: float, directory: str = DEFAULT_PROFILE_DIR,
+                           signum: int = getattr(signal, "SIGUSR1", None)) -> None:
+    """Start a capture window whenever the process receives `signum` (SIGUSR1)."""
+    if signum is None:
+        return
+
+    def handler(_signum, _frame):
+        # Don't do file or lock work inside the signal handler itself.
+        threading.Thread(
+            target=request_capture, args=(seconds, directory), name="profile-request", daemon=True
+        ).start()
+
+    try:
+        signal.signal(signum, handler)
+    except ValueError:
+        logger.warning("cProfile signal trigger unavailable outside the main thread")
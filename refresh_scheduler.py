@@ -0,0 +1,208 @@
+"""
+Spread-out scheduling for the periodic refresh.
+
+Instead of refreshing every container back to back once per
+`STD_REFRESH_SECONDS` (a write burst at STD that lines up across hosts
+started together), each container gets its own slot within the
+interval and is refreshed there, plus a random jitter:
+
+    slot(cid) = (hash(cid) + phase) mod 1 × interval
+
+`phase` is random per scheduler, so two notifiers watching identical
+containers still land on different slots. The schedule is fixed-rate:
+a container's next slot is its previous slot plus the interval, not
+"now plus the interval", so the period does not stretch as refresh
+work grows. Jitter is drawn fresh for each refresh and never
+accumulates. If the loop falls more than an interval behind, the
+missed slots are skipped rather than run in a burst.
+
+How often each container is refreshed is decided by a refresh policy:
+
+  fixed     every container every `interval` seconds.
+  adaptive  a container starts at `interval`; each refresh without an
+            intervening lifecycle event multiplies its interval by
+            `growth`, up to `max_interval`. Any lifecycle event
+            (`note_event`) snaps it back to `interval` and pulls its
+            next refresh forward. Long-lived containers settle at the
+            slow cadence; recently restarted ones stay on the fast one.
+
+A policy is any object with `interval(cid)`, `refreshed(cid)`,
+`reset(cid)` and `forget(cid)`; `make_policy()` builds the built-in
+ones by name (`REFRESH_POLICY`).
+
+Usage:
+
+    from refresh_scheduler import RefreshScheduler, make_policy
+
+    scheduler = RefreshScheduler(make_policy("adaptive", 60, 900), jitter=0.1)
+    scheduler.sync(running_ids)             # add new containers, drop gone ones
+    for cid in scheduler.pop_due():         # refresh these now
+        ...
+    scheduler.note_event(cid)               # from the event path, any thread
+    time.sleep(scheduler.next_due() - time.monotonic())
+
+Methods are thread-safe, but one scheduler belongs to one refresh loop.
+"""
+
+import heapq
+import math
+import random
+import threading
+import time
+import zlib
+
+from logging_setup import get_logger
+
+logger = get_logger("refresh_scheduler")
+
+
+class FixedRefreshPolicy:
+    """Every container refreshes every `interval` seconds."""
+
+    name = "fixed"
+
+    def __init__(self, interval: float):
+        self.min_interval = max(float(interval), 1.0)
+
+    def interval(self, container_id: str) -> float:
+        return self.min_interval
+
+    def refreshed(self, container_id: str) -> None:
+        pass
+
+    def reset(self, container_id: str) -> None:
+        pass
+
+    def forget(self, container_id: str) -> None:
+        pass
+
+
+class AdaptiveRefreshPolicy(FixedRefreshPolicy):
+    """Interval grows by `growth` per quiet refresh, up to `max_interval`; events reset it."""
+
+    name = "adaptive"
+
+    def __init__(self, interval: float, max_interval: float, growth: float = 2.0):
+        super().__init__(interval)
+        self.max_interval = max(float(max_interval), self.min_interval)
+        self.growth = max(float(growth), 1.0)
+        self._intervals: dict = {}
+
+    def interval(self, container_id: str) -> float:
+        return self._intervals.get(container_id, self.min_interval)
+
+    def refreshed(self, container_id: str) -> None:
+        self._intervals[container_id] = min(self.interval(container_id) * self.growth, self.max_interval)
+
+    def reset(self, container_id: str) -> None:
+        self._intervals.pop(container_id, None)
+
+    def forget(self, container_id: str) -> None:
+        self._intervals.pop(container_id, None)
+
+
+def make_policy(name: str, interval: float, max_interval: float, growth: float = 2.0):
+    """Build a refresh policy by name; unknown names fall back to `fixed`."""
+    name = (name or FixedRefreshPolicy.name).strip().lower()
+    if name == AdaptiveRefreshPolicy.name:
+        return AdaptiveRefreshPolicy(interval, max_interval, growth)
+    if name != FixedRefreshPolicy.name:
+        logger.warning(f"Unknown refresh policy {name!r}; using fixed")
+    return FixedRefreshPolicy(interval)
+
+
+class RefreshScheduler:
+    """Per-container refresh slots on a min-heap of due times."""
+
+    def __init__(self, policy, jitter: float = 0.1, spread: bool = True,
+                 clock=time.monotonic, rng=None):
+        self.policy = policy
+        # Base cadence: slots are laid out over this, and it is the
+        # interval containers return to after a lifecycle event.
+        self.interval = policy.min_interval
+        self.jitter = max(float(jitter), 0.0)
+        self.spread = spread
+        self.clock = clock
+        self._rng = rng or random.Random()
+        self._phase = self._rng.random() if spread else 0.0
+        self._anchor = clock()
+        self._lock = threading.Lock()
+        # cid -> slot time of its pending heap entry; entries whose slot
+        # no longer matches (container gone or rescheduled) are skipped.
+        self._slots: dict = {}
+        self._heap: list = []
+
+    def _offset(self, container_id: str) -> float:
+        if not self.spread:
+            return 0.0
+        fraction = zlib.crc32(container_id.encode("utf-8")) / 2**32
+        return (fraction + self._phase) % 1.0 * self.interval
+
+    def _next_slot_after(self, slot: float, now: float, interval: float) -> float:
+        """`slot` moved forward by whole intervals to the first one after `now`."""
+        if slot > now:
+            return slot
+        return slot + (math.floor((now - slot) / interval) + 1) * interval
+
+    def _schedule(self, container_id: str, slot: float) -> None:
+        self._slots[container_id] = slot
+        interval = self.policy.interval(container_id)
+        jitter = self._rng.uniform(0.0, self.jitter * interval) if self.spread else 0.0
+        heapq.heappush(self._heap, (slot + jitter, container_id, slot))
+
+    def sync(self, container_ids, now: float = None) -> None:
+        """Track exactly `container_ids`: new ones get their next slot, gone ones are dropped."""
+        now = self.clock() if now is None else now
+        wanted = set(container_ids)
+        with self._lock:
+            for container_id in [cid for cid in self._slots if cid not in wanted]:
+                del self._slots[container_id]
+                self.policy.forget(container_id)
+            for container_id in wanted.difference(self._slots):
+                slot = self._anchor + self._offset(container_id)
+                self._schedule(container_id, self._next_slot_after(slot, now, self.interval))
+            if len(self._heap) > 2 * len(self._slots) + 64:
+                self._heap = [e for e in self._heap if self._slots.get(e[1]) == e[2]]
+                heapq.heapify(self._heap)
+
+    def pop_due(self, now: float = None) -> list:
+        """IDs whose refresh time has come; each is rescheduled by its policy interval."""
+        now = self.clock() if now is None else now
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, container_id, slot = heapq.heappop(self._heap)
+                if self._slots.get(container_id) != slot:
+                    continue
+                due.append(container_id)
+                self.policy.refreshed(container_id)
+                interval = self.policy.interval(container_id)
+                self._schedule(container_id, self._next_slot_after(slot + interval, now, interval))
+        return due
+
+    def note_event(self, container_id: str, now: float = None) -> None:
+        """
+        A lifecycle event was delivered for the container: reset its
+        policy interval and, if its next refresh is further out than
+        that, pull it forward.
+        """
+        now = self.clock() if now is None else now
+        with self._lock:
+            self.policy.reset(container_id)
+            slot = self._slots.get(container_id)
+            if slot is None:
+                return
+            earliest = now + self.policy.interval(container_id)
+            if slot > earliest:
+                self._schedule(container_id, earliest)
+
+    def next_due(self):
+        """Monotonic time of the next refresh, or None when nothing is scheduled."""
+        with self._lock:
+            while self._heap and self._slots.get(self._heap[0][1]) != self._heap[0][2]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._slots)
@@ -1,14 +1,18 @@
 """
 Shared retry policy for notifier modules.
 
-Wraps `tenacity` with the project-wide retry policy. Use as a
-decorator on functions that make outbound HTTP calls:
+Notifier delivery goes through `deliver()`, which makes the first
+attempt in the calling thread and hands any retries to a shared
+timer-heap scheduler, so a delivery worker or the refresh sweep never
+sleeps through a backoff:
 
-    from retry import with_retry
+    import retry
 
-    @with_retry
-    def my_outbound_call(...):
-        ...
+    retry.deliver(
+        key, send_once, (endpoint, payload, headers),
+        on_success=lambda response: ...,   # after any successful attempt
+        on_failure=lambda exc: ...,        # after the last failed attempt
+    )
 
 The retry policy:
   - 3 attempts total
@@ -16,28 +20,43 @@ The retry policy:
   - Retries only on `requests.RequestException` (network errors,
     timeouts, connection errors, HTTP errors raised via
     `raise_for_status()`).
-  - Re-raises the last exception if all attempts fail.
+  - The last exception is passed to `on_failure` if all attempts fail.
 
 These values are deliberately module-level constants so a future
 parameterized version (e.g. per-notifier policy presets) is a small
 refactor rather than a redesign.
 
-Idempotency: `with_retry` assumes the wrapped operation is idempotent.
+Metrics: every attempt's duration and outcome, every retry, and every
+final failure are recorded in `metrics.py`, labelled with the
+notifier's module name (e.g. `service_tracker_dashboard`). With stage
+timing enabled, the time a call spends in the caller's thread is also
+recorded as the `http.<notifier>` stage (see `profiling.py`).
+
+Idempotency: `deliver()` assumes the wrapped operation is idempotent.
 If a request succeeds on the server but the response is lost in
 transit, retrying will re-issue the same request. Both current
 consumers (STD `/api/register` upsert, Technitium DNS with
 `overwrite=true`) are idempotent. A future notifier wrapping a
-non-idempotent operation must NOT use `with_retry` and should
-implement explicit single-attempt error handling instead.
+non-idempotent operation must NOT use it and should implement
+explicit single-attempt error handling instead.
 """
 
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
 import requests
-from tenacity import (
-    retry,
-    stop_after_attempt,
-    wait_exponential,
-    retry_if_exception_type,
-)
+
+import metrics
+import profiling
+from circuit_breaker import CircuitOpenError
+from logging_setup import get_logger
+
+logger = get_logger("retry")
 
 # Policy values — change here, not at call sites.
 MAX_ATTEMPTS = 3
@@ -45,15 +64,191 @@ BACKOFF_MULTIPLIER = 1
 BACKOFF_MIN_SECONDS = 2
 BACKOFF_MAX_SECONDS = 10
 RETRY_ON = (requests.RequestException,)
+# Threads that run deferred retries for `deliver()`.
+RETRY_WORKERS = 2
+
+
+def _notifier_name(fn) -> str:
+    """`notifiers.service_tracker_dashboard` -> `service_tracker_dashboard`."""
+    return (getattr(fn, "__module__", None) or "unknown").rsplit(".", 1)[-1]
+
+
+def _timed_call(notifier: str, fn, args, kwargs):
+    """One attempt of `fn`, recorded in the per-notifier request histogram."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = fn(*args, **kwargs)
+        outcome = "success"
+        return result
+    finally:
+        metrics.NOTIFIER_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, notifier=notifier, outcome=outcome
+        )
+
+
+# ---------------------------------------------------------------------------
+# Non-blocking delivery
+# ---------------------------------------------------------------------------
+
+def backoff_delay(failed_attempts: int) -> float:
+    """Seconds to wait after `failed_attempts` consecutive failures (2s, 4s, 8s, capped)."""
+    delay = BACKOFF_MULTIPLIER * 2 ** failed_attempts
+    return max(BACKOFF_MIN_SECONDS, min(delay, BACKOFF_MAX_SECONDS))
+
+
+@dataclass
+class _RetryJob:
+    key: str
+    notifier: str
+    fn: Callable
+    args: tuple
+    kwargs: dict
+    on_success: Optional[Callable]
+    on_failure: Optional[Callable]
+    breaker: object
+    attempts: int
+    generation: int
+
+
+class RetryScheduler:
+    """
+    Timer heap of pending retries, serviced by one timer thread and a
+    small pool of retry workers.
+
+    `deliver()` makes the first attempt in the calling thread and
+    returns as soon as it has succeeded or failed. A failure is pushed
+    onto the heap with its backoff as the due time; the timer thread
+    hands due retries to the workers, so neither the caller nor other
+    retries ever sleep through a backoff.
+
+    Retries are keyed (e.g. by container): a new `deliver()` for the
+    same key supersedes any retry still waiting, so an outdated payload
+    is never re-sent after a newer one.
+    """
+
+    def __init__(self, workers: int = RETRY_WORKERS):
+        self._cond = threading.Condition()
+        self._heap: list = []
+        self._seq = itertools.count()
+        # key -> generation of the latest unfinished deliver() for that key.
+        # Generations come from one counter for the whole scheduler, so a
+        # retry left from before a key's entry was forgotten can never
+        # match a later delivery's generation.
+        self._generation_ids = itertools.count(1)
+        self._generations: dict = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="retry")
+        self._thread = None
+
+    def deliver(self, key: str, fn, args=(), kwargs=None, on_success=None, on_failure=None,
+                breaker=None) -> bool:
+        """
+        Call `fn(*args, **kwargs)` under the shared retry policy without blocking.
+
+        Returns True if the first attempt succeeded. On success
+        `on_success(result)` runs; once every attempt has failed,
+        `on_failure(exc)` runs — both on whichever thread made the
+        final attempt. Exceptions outside `RETRY_ON` are not retried
+        and propagate to the caller on the first attempt.
+
+        With a `breaker` (see circuit_breaker.py), every attempt first
+        asks it for permission; while it is open the delivery fails at
+        once with `CircuitOpenError` instead of being sent or retried.
+        """
+        with self._cond:
+            generation = next(self._generation_ids)
+            self._generations[key] = generation
+        job = _RetryJob(key, _notifier_name(fn), fn, tuple(args), dict(kwargs or {}),
+                        on_success, on_failure, breaker, 0, generation)
+        with profiling.stage(f"http.{job.notifier}"):
+            return self._attempt(job)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _attempt(self, job: _RetryJob) -> bool:
+        if job.breaker is not None and not job.breaker.allow():
+            self._forget(job)
+            if job.on_failure is not None:
+                job.on_failure(CircuitOpenError(f"circuit open for {job.breaker.name}"))
+            return False
+        job.attempts += 1
+        try:
+            result = _timed_call(job.notifier, job.fn, job.args, job.kwargs)
+        except Exception as e:
+            if job.breaker is not None:
+                job.breaker.record(e)
+            if not isinstance(e, RETRY_ON):
+                self._forget(job)
+                raise
+            if job.attempts < MAX_ATTEMPTS:
+                metrics.NOTIFIER_RETRIES.inc(notifier=job.notifier)
+                self._schedule(job, backoff_delay(job.attempts))
+            else:
+                self._forget(job)
+                metrics.NOTIFIER_FAILURES.inc(notifier=job.notifier)
+                if job.on_failure is not None:
+                    job.on_failure(e)
+            return False
+        if job.breaker is not None:
+            job.breaker.record_success()
+        self._forget(job)
+        if job.on_success is not None:
+            job.on_success(result)
+        return True
+
+    def _schedule(self, job: _RetryJob, delay: float) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="retry-timer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _forget(self, job: _RetryJob) -> None:
+        with self._cond:
+            if self._generations.get(job.key) == job.generation:
+                del self._generations[job.key]
+
+    def _superseded(self, job: _RetryJob) -> bool:
+        with self._cond:
+            return self._generations.get(job.key) != job.generation
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout)
+                _, _, job = heapq.heappop(self._heap)
+            self._executor.submit(self._run_retry, job)
+
+    def _run_retry(self, job: _RetryJob) -> None:
+        if self._superseded(job):
+            logger.debug(f"Dropping superseded {job.notifier} retry for {job.key}")
+            return
+        try:
+            self._attempt(job)
+        except Exception as e:
+            self._forget(job)
+            logger.error(f"{job.notifier} retry for {job.key} failed: {e}")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RetryScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RetryScheduler()
+            metrics.RETRY_PENDING.set_function(_scheduler.pending)
+        return _scheduler
 
 
-with_retry = retry(
-    reraise=True,
-    stop=stop_after_attempt(MAX_ATTEMPTS),
-    wait=wait_exponential(
-        multiplier=BACKOFF_MULTIPLIER,
-        min=BACKOFF_MIN_SECONDS,
-        max=BACKOFF_MAX_SECONDS,
-    ),
-    retry=retry_if_exception_type(RETRY_ON),
-)
+def deliver(key: str, fn, args=(), kwargs=None, on_success=None, on_failure=None,
+            breaker=None) -> bool:
+    """`RetryScheduler.deliver()` on the shared scheduler."""
+    return get_scheduler().deliver(key, fn, args, kwargs, on_success, on_failure, breaker)
@@ -0,0 +1,115 @@
+"""
+Small JSON-backed key/value store for notifier-side caches.
+
+Used by notifier modules that want to remember what they last sent
+(e.g. STD payload fingerprints) across restarts. Entries are plain
+JSON-serialisable values keyed by string.
+
+Usage:
+
+    from state_store import JsonStateStore
+
+    store = JsonStateStore("/config/std_change_cache.json")
+    store.set("host/abc123", {"fingerprint": "...", "sent_at": 1715700000})
+    store.flush()
+
+Passing `path=None` gives an in-memory store with the same interface;
+nothing is read from or written to disk.
+
+Writes are atomic (temp file + rename) and throttled: `set()` and
+`delete()` only rewrite the file when at least `save_interval`
+seconds have passed since the last write. Call `flush()` at natural
+checkpoints (end of a sweep, shutdown) to persist anything pending.
+A missing or corrupt file is logged and treated as empty — the cache
+is an optimisation, never a source of truth.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from logging_setup import get_logger
+
+logger = get_logger("state_store")
+
+DEFAULT_SAVE_INTERVAL_SECONDS = 30
+
+
+class JsonStateStore:
+    """Thread-safe dict with optional throttled JSON persistence."""
+
+    def __init__(self, path: Optional[str] = None,
+                 save_interval: float = DEFAULT_SAVE_INTERVAL_SECONDS):
+        self.path = path or None
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._data: dict = {}
+        self._dirty = False
+        self._last_save = 0.0
+        if self.path:
+            self._data = self._read()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._dirty = True
+            self._maybe_save_locked()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self._dirty = True
+                self._maybe_save_locked()
+
+    def items(self) -> list:
+        """Snapshot of (key, value) pairs; safe to iterate while others write."""
+        with self._lock:
+            return list(self._data.items())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def flush(self) -> None:
+        """Write pending changes to disk now (no-op for in-memory stores)."""
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+    def _maybe_save_locked(self) -> None:
+        if self.path and time.monotonic() - self._last_save >= self.save_interval:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        self._dirty = False
+        if not self.path:
+            return
+        self._last_save = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write state file {self.path}: {e}")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.path}: {e}")
+            return {}
+        if not isinstance(data, dict):
+            logger.warning(f"Ignoring state file {self.path}: top level is not an object")
+            return {}
+        logger.info(f"Loaded {len(data)} entr{'y' if len(data) == 1 else 'ies'} from {self.path}")
+        return data
@@ -0,0 +1,153 @@
+"""
+EvaluationPlan in interpreter_loader.py against a plain per-interpreter scan.
+
+    python -m unittest discover -s tests
+
+The plan only `fullmatch`es a label key against interpreters whose
+literal prefix it starts with; these tests check that index never
+changes the output.
+"""
+
+import os
+import random
+import sys
+import unittest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+os.environ.setdefault("NOTIFIER_LOG_TO_STDOUT", "0")
+
+import interpreter_loader  # noqa: E402
+
+BUILTIN_DIR = os.path.join(REPO_ROOT, "interpreters", "builtin")
+
+
+def _regex_interpreter(name: str, pattern: str, capture: str = None) -> dict:
+    emit = {"layer": name, "hostname": "{key}"}
+    if capture:
+        emit["details"] = {capture: "{" + capture + "}"}
+    return {
+        "name": name,
+        "match": {"any_label_key_matches": pattern},
+        "extract": {"key": {"from_label": "bench.key", "default": name}},
+        "emit": emit,
+    }
+
+
+TEST_DOCS = [
+    _regex_interpreter("alternation_group", r"(foo|bar)\.(?P<x>\w+)", "x"),
+    _regex_interpreter("alternation_top", r"foo\.one|bar\.two"),
+    _regex_interpreter("optional_char", r"abc?d\.(?P<n>\d+)", "n"),
+    _regex_interpreter("optional_brace", r"ab{0,1}c\.x"),
+    _regex_interpreter("star", r"ab*c\.y"),
+    _regex_interpreter("ignorecase", r"(?i)traefik\.http\.routers\.(?P<r>[^.]+)\.rule", "r"),
+    _regex_interpreter("escape_class", r"\w+\.cls"),
+    _regex_interpreter("escaped_literal", r"x\-y\.(?P<z>.+)", "z"),
+    {
+        "name": "fixed_key",
+        "match": {"label_key": "app.enable", "label_value_equals": "true"},
+        "extract": {"key": {"from_label": "app.enable"}},
+        "emit": {"layer": "fixed_key", "hostname": "{key}"},
+    },
+]
+
+LABEL_KEYS = [
+    "foo.a", "bar.b", "baz.c", "foo.one", "bar.two", "foo.two",
+    "abd.1", "abcd.22", "abccd.3", "ac.x", "abc.x", "abbc.x",
+    "ac.y", "abbbc.y", "traefik.http.routers.web.rule",
+    "Traefik.HTTP.Routers.Api.Rule", "TRAEFIK.http.routers.x.rule",
+    "traefik.http.routers.web.tls", "any.cls", ".cls", "x-y.q", "x.y.q",
+    "app.enable", "dockflare.enable", "dockflare.hostname",
+]
+
+
+def _load_test_interpreters() -> list:
+    interpreters = []
+    for doc in TEST_DOCS:
+        interp = interpreter_loader._validate_and_compile(doc, f"<test:{doc['name']}>")
+        assert interp is not None, doc["name"]
+        interpreters.append(interp)
+    return interpreters
+
+
+def _reference_evaluate(plan, labels: dict) -> list:
+    """Each interpreter on its own, `fullmatch` on every key, no prefix index."""
+    results = []
+    for compiled in plan._compiled:
+        interp = compiled.interp
+        if interp.match_any_label_key is not None:
+            for key in labels:
+                m = interp.match_any_label_key.fullmatch(key)
+                if m is None:
+                    continue
+                obs = interpreter_loader._run_extract_and_emit(compiled, labels, dict(m.groupdict()))
+                if obs is not None:
+                    results.append(obs)
+            continue
+        value = labels.get(interp.match_label_key)
+        if value is None:
+            continue
+        if interp.match_label_value_equals is not None:
+            if str(value).strip().lower() != interp.match_label_value_equals.strip().lower():
+                continue
+        obs = interpreter_loader._run_extract_and_emit(compiled, labels, {})
+        if obs is not None:
+            results.append(obs)
+    return results
+
+
+class LiteralPrefixTest(unittest.TestCase):
+
+    def test_prefixes(self):
+        cases = {
+            r"traefik\.http\.routers\.(?P<r>[^.]+)\.rule": "traefik.http.routers.",
+            r"(foo|bar)\.x": "",
+            r"foo\.one|bar\.two": "",
+            r"abc?d": "ab",
+            r"ab{0,1}c": "a",
+            r"ab*c": "a",
+            r"ab+c": "ab",
+            r"(?i)traefik\.enable": "",
+            r"\w+\.cls": "",
+            r"x\-y\.z": "x-y.z",
+        }
+        for pattern, expected in cases.items():
+            with self.subTest(pattern=pattern):
+                self.assertEqual(interpreter_loader._literal_prefix(pattern), expected)
+
+
+class PlanMatchesReferenceTest(unittest.TestCase):
+
+    def setUp(self):
+        builtin = interpreter_loader.load_interpreters(BUILTIN_DIR, "/nonexistent").interpreters
+        self.assertTrue(builtin)
+        self.plan = interpreter_loader.compile_plan(list(builtin) + _load_test_interpreters())
+
+    def assertSameAsReference(self, labels: dict):
+        self.assertEqual(self.plan.evaluate(labels), _reference_evaluate(self.plan, labels))
+
+    def test_every_key(self):
+        labels = {key: "true" for key in LABEL_KEYS}
+        labels["traefik.http.routers.web.rule"] = "Host(`web.example.com`)"
+        labels["dockflare.hostname"] = "df.example.com"
+        self.assertSameAsReference(labels)
+        layers = {obs["layer"] for obs in self.plan.evaluate(labels)}
+        self.assertLessEqual({"traefik", "dockflare", "ignorecase", "fixed_key"}, layers)
+
+    def test_fixed_key_value_is_case_insensitive(self):
+        for value in ("true", "TRUE", " True ", "false", ""):
+            with self.subTest(value=value):
+                self.assertSameAsReference({"app.enable": value, "dockflare.enable": value,
+                                            "dockflare.hostname": "df.example.com"})
+
+    def test_random_label_sets(self):
+        rng = random.Random(8)
+        for _ in range(200):
+            keys = rng.sample(LABEL_KEYS, rng.randint(0, len(LABEL_KEYS)))
+            labels = {key: rng.choice(["true", "False", "Host(`h.example.com`)", "x"]) for key in keys}
+            self.assertSameAsReference(labels)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Keyed, non-blocking retries in retry.py.
+
+    python -m unittest discover -s tests
+
+Importing the notifier modules configures logging as the notifier does,
+so `/config` must be writable (or run inside the container).
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+os.environ.setdefault("NOTIFIER_LOG_TO_STDOUT", "0")
+
+import requests  # noqa: E402
+
+import retry  # noqa: E402
+
+RETRY_DELAY = 0.05
+
+
+class SupersedeTest(unittest.TestCase):
+
+    def setUp(self):
+        patch = mock.patch.object(retry, "backoff_delay", lambda _attempts: RETRY_DELAY)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.scheduler = retry.RetryScheduler(workers=1)
+        self.sent = []
+        self.failures = []
+        self.lock = threading.Lock()
+
+    def send(self, payload, fail=False):
+        with self.lock:
+            self.sent.append(payload)
+        if fail:
+            raise requests.ConnectionError(f"{payload} failed")
+        return payload
+
+    def deliver(self, payload, fail_first=False):
+        attempts = []
+
+        def send_once():
+            attempts.append(payload)
+            return self.send(payload, fail=fail_first and len(attempts) == 1)
+
+        return self.scheduler.deliver("host/c1", send_once, on_failure=self.failures.append)
+
+    def test_old_retry_is_dropped_after_newer_delivery_succeeds(self):
+        self.assertFalse(self.deliver("A", fail_first=True))
+        self.assertTrue(self.deliver("B"))
+        time.sleep(RETRY_DELAY * 6)
+        self.assertEqual(self.sent, ["A", "B"])
+        self.assertEqual(self.failures, [])
+
+    def test_old_retry_is_dropped_while_a_later_delivery_retries(self):
+        # B finishing clears the key; C must not reuse A's generation.
+        self.assertFalse(self.deliver("A", fail_first=True))
+        self.assertTrue(self.deliver("B"))
+        self.assertFalse(self.deliver("C", fail_first=True))
+        time.sleep(RETRY_DELAY * 6)
+        self.assertEqual(self.sent, ["A", "B", "C", "C"])
+        self.assertEqual(self.failures, [])
+        self.assertEqual(self.scheduler.pending(), 0)
+
+    def test_latest_delivery_is_retried(self):
+        self.assertFalse(self.deliver("A", fail_first=True))
+        time.sleep(RETRY_DELAY * 6)
+        self.assertEqual(self.sent, ["A", "A"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+STD bulk registration against the local stand-in server (tools/std_stub.py).
+
+    python -m unittest discover -s tests
+
+Importing the notifier modules configures logging as the notifier does,
+so `/config` must be writable (or run inside the container).
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+os.environ.setdefault("NOTIFIER_LOG_TO_STDOUT", "0")
+
+import outbox  # noqa: E402
+from notifiers import service_tracker_dashboard as std  # noqa: E402
+from tools.std_stub import start_stub_server  # noqa: E402
+
+
+def _items(count: int) -> list:
+    return [
+        {
+            "container_name": f"c{i}",
+            "container_id": f"id{i}",
+            "docker_host": "testhost",
+            "docker_status": "running",
+            "action": "boot",
+        }
+        for i in range(count)
+    ]
+
+
+class RegisterManyTest(unittest.TestCase):
+
+    def start_stub(self, **options):
+        server = start_stub_server(**options)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        env = mock.patch.dict(os.environ, {
+            "STD_URL": f"http://127.0.0.1:{server.server_port}",
+            "STD_API_TOKEN": "test",
+            "STD_BULK_REGISTER": "true",
+            "STD_BULK_MAX_ITEMS": "2",
+            "STD_CHANGE_DETECTION": "false",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        return server
+
+    def setUp(self):
+        patches = [
+            mock.patch.object(std, "_bulk_supported", None),
+            mock.patch.object(outbox, "_outbox", outbox.Outbox(None)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_items_are_chunked(self):
+        server = self.start_stub()
+        self.assertEqual(std.register_many(_items(5)), [])
+        self.assertEqual(server.bulk_requests, 3)
+        self.assertEqual([p["container_name"] for p in server.received], [f"c{i}" for i in range(5)])
+        self.assertIs(std._bulk_supported, True)
+
+    def test_falls_back_to_single_registration(self):
+        server = self.start_stub(bulk=False)
+        self.assertEqual(std.register_many(_items(3)), [])
+        self.assertIs(std._bulk_supported, False)
+        # One bulk request answered 404, then one single post per item.
+        self.assertEqual(server.bulk_requests, 1)
+        self.assertEqual(len(server.received), 3)
+
+        # The fallback is remembered: no further bulk attempt.
+        self.assertEqual(std.register_many(_items(2)), [])
+        self.assertEqual(server.bulk_requests, 1)
+        self.assertEqual(len(server.received), 5)
+
+    def test_per_item_failure_is_reported_and_queued(self):
+        self.start_stub(fail_names={"c1"})
+        self.assertEqual(std.register_many(_items(3)), ["c1"])
+        box = outbox.get_outbox()
+        self.assertEqual(len(box), 1)
+        [(notifier, key, entry)] = box.due(now=float("inf"))
+        self.assertEqual((notifier, key), (std.OUTBOX_NAME, "testhost/id1"))
+        self.assertEqual(entry["payload"]["container_name"], "c1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Local stand-in for a Service Tracker Dashboard server.
+
+Accepts the two endpoints the STD notifier talks to and records what
+it receives, so the notifier can be exercised without a real STD:
+
+    POST /api/v1/register        one canonical payload
+    POST /api/v1/register/bulk   {"items": [payload, ...]}
+
+Run standalone and point the notifier at it:
+
+    python tools/std_stub.py --port 8815
+    STD_URL=http://127.0.0.1:8815 STD_API_TOKEN=anything python main.py
+
+Options:
+    --no-bulk           answer 404 on the bulk endpoint (old STD)
+    --fail NAME         report this container_name as failed in bulk
+                        responses and answer 500 for it on single
+                        registration (repeatable)
+    --delay SECONDS     sleep before every response
+
+Or embed it, e.g. from a benchmark or an ad-hoc script:
+
+    from tools.std_stub import start_stub_server
+    server = start_stub_server(port=0)
+    url = f"http://127.0.0.1:{server.server_port}"
+    ...
+    server.received      # list of payloads in arrival order
+    server.bulk_requests # POSTs to the bulk endpoint, including 404s
+    server.shutdown()
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server_version = "std-stub/1"
+
+    def do_POST(self):
+        stub = self.server
+        if stub.delay:
+            time.sleep(stub.delay)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            self._reply(400, {"detail": "invalid JSON"})
+            return
+
+        if self.path == "/api/v1/register":
+            with stub.lock:
+                stub.requests += 1
+                stub.received.append(body)
+            name = body.get("container_name") if isinstance(body, dict) else None
+            if name in stub.fail_names:
+                self._reply(500, {"detail": f"forced failure for {name}"})
+            else:
+                self._reply(200, {"ok": True})
+            return
+
+        if self.path == "/api/v1/register/bulk":
+            with stub.lock:
+                stub.bulk_requests += 1
+            if not stub.bulk:
+                self._reply(404, {"detail": "Not Found"})
+                return
+            items = body.get("items") if isinstance(body, dict) else None
+            if not isinstance(items, list):
+                self._reply(422, {"detail": "`items` must be a list"})
+                return
+            results = []
+            with stub.lock:
+                stub.requests += 1
+                for item in items:
+                    stub.received.append(item)
+                    name = item.get("container_name") if isinstance(item, dict) else None
+                    if name in stub.fail_names:
+                        results.append({"ok": False, "error": f"forced failure for {name}"})
+                    else:
+                        results.append({"ok": True})
+            self._reply(200, {"results": results})
+            return
+
+        self._reply(404, {"detail": "Not Found"})
+
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, bulk=True, fail_names=(), delay=0.0, verbose=False):
+        super().__init__(address, _StubHandler)
+        self.bulk = bulk
+        self.fail_names = set(fail_names)
+        self.delay = delay
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.received = []
+        self.requests = 0
+        self.bulk_requests = 0
+
+
+def start_stub_server(host="127.0.0.1", port=0, **options) -> StubServer:
+    """Start a StubServer on a background thread and return it."""
+    server = StubServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="std-stub", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in STD server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8815)
+    parser.add_argument("--no-bulk", action="store_true")
+    parser.add_argument("--fail", action="append", default=[], metavar="NAME")
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubServer(
+        (args.host, args.port),
+        bulk=not args.no_bulk,
+        fail_names=args.fail,
+        delay=args.delay,
+        verbose=True,
+    )
+    print(f"std-stub listening on http://{args.host}:{server.server_port} "
+          f"(bulk {'off' if args.no_bulk else 'on'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()